@@ -1,6 +1,9 @@
 """API v1 endpoints."""
-from fastapi import APIRouter, HTTPException
-from typing import Optional
+import json
+from datetime import datetime
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
 
 from app.models.requests import (
     TaskRequest,
@@ -8,41 +11,48 @@ from app.models.requests import (
     ComplianceRequest,
     FraudDetectionRequest,
     PortfolioRequest,
+    BatchTaskRequest,
+    BatchRiskAssessmentRequest,
+    BatchComplianceRequest,
+    BatchFraudDetectionRequest,
+    BatchPortfolioRequest,
 )
 from app.models.responses import (
     TaskResponse,
+    BatchResponse,
     StatsResponse,
     MemoryListResponse,
+    ConsolidationResponse,
+    ImportResponse,
     HealthResponse,
+    LivenessResponse,
+    ReadinessResponse,
 )
 from app.services.agent_service import AgentService
 from app.services.financial_service import FinancialService
-from app.services.memory_service import MemoryService
-from app.core.config import MEMORY_FILE
+from app.services.llm_client import LLMUnavailableError
+from app.services.registry import get_memory_service, memory_services
+from app.services.secondary_index import encode_cursor, decode_cursor
+from app.services.memory_transfer import iter_export, aimport_chunks
+from app.core.config import MEMORY_FILE, FINANCIAL_MEMORY_FILE
 
 router = APIRouter()
 
-# Initialize services
+# Initialize services (memory stores and the encoder are shared via the registry)
 agent_service = AgentService()
 financial_service = FinancialService()
-memory_service = MemoryService()
+memory_service = get_memory_service(MEMORY_FILE)
 
 
 @router.get("/health", response_model=HealthResponse)
 async def health_check():
-    """Health check endpoint."""
+    """Health check endpoint (reports the already-initialized services)."""
     try:
-        from app.services.llm_service import LLMService
-        from app.services.memory_service import MemoryService
-        
-        llm = LLMService()
-        memory = MemoryService()
-        
         return HealthResponse(
             status="healthy",
             agent_ready=True,
-            vector_search_available=memory.use_vector,
-            llm_available=llm.provider != "mock"
+            vector_search_available=memory_service.use_vector,
+            llm_available=agent_service.llm.provider != "mock"
         )
     except Exception as e:
         return HealthResponse(
@@ -53,85 +63,183 @@ async def health_check():
         )
 
 
+@router.get("/live", response_model=LivenessResponse)
+async def liveness():
+    """Liveness probe: the process is up and serving requests."""
+    return LivenessResponse(status="alive")
+
+
+@router.get("/ready", response_model=ReadinessResponse)
+async def readiness():
+    """Readiness probe: cached state of the initialized services, no I/O."""
+    stores = [service.status() for service in memory_services().values()]
+    llm_status = agent_service.llm.status()
+    ready = bool(stores)
+    status = "ready" if ready else "not_ready"
+    if ready and llm_status["circuit_state"] != "closed":
+        status = "degraded"
+    
+    response = ReadinessResponse(
+        status=status,
+        ready=ready,
+        stores=stores,
+        llm_provider=llm_status["provider"],
+        llm_model=llm_status["model"],
+        llm_circuit_state=llm_status["circuit_state"],
+        llm_cache=llm_status["cache"],
+        llm_backends=llm_status["backends"],
+        agent_caches={"general": agent_service.cache_stats(), "financial": financial_service.cache_stats()}
+    )
+    return JSONResponse(status_code=200 if ready else 503, content=response.model_dump())
+
+
 @router.post("/solve", response_model=TaskResponse)
-async def solve_task(request: TaskRequest):
+async def solve_task(
+    request: TaskRequest,
+    stream: bool = Query(False, description="Stream the solution as server-sent events")
+):
     """Solve a general task."""
     try:
-        result = agent_service.solve_task(
+        if stream:
+            return _event_stream(agent_service.astream_task(
+                task=request.task,
+                task_type=request.task_type,
+                use_llm=request.use_llm
+            ))
+        result = await agent_service.asolve_task(
             task=request.task,
             task_type=request.task_type,
             use_llm=request.use_llm
         )
         return TaskResponse(**result)
+    except LLMUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.post("/risk", response_model=TaskResponse)
-async def assess_risk(request: RiskAssessmentRequest):
+async def assess_risk(
+    request: RiskAssessmentRequest,
+    stream: bool = Query(False, description="Stream the solution as server-sent events")
+):
     """Assess transaction risk."""
     try:
-        transaction = {
-            "type": request.transaction_type,
-            "amount": request.amount
-        }
-        customer_profile = {
-            "tier": request.customer_tier,
-            "account_age_days": request.account_age_days
-        }
-        
-        result = financial_service.assess_risk(transaction, customer_profile)
+        if stream:
+            return _event_stream(financial_service.astream_risk(*_risk_args(request)))
+        result = await financial_service.aassess_risk(*_risk_args(request))
         return TaskResponse(**result)
+    except LLMUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.post("/compliance", response_model=TaskResponse)
-async def check_compliance(request: ComplianceRequest):
+async def check_compliance(
+    request: ComplianceRequest,
+    stream: bool = Query(False, description="Stream the solution as server-sent events")
+):
     """Check regulatory compliance."""
     try:
-        transaction = {
-            "type": request.transaction_type,
-            "amount": request.amount,
-            "region": request.region
-        }
-        
-        result = financial_service.check_compliance(transaction, request.regulation)
+        if stream:
+            return _event_stream(financial_service.astream_compliance(*_compliance_args(request)))
+        result = await financial_service.acheck_compliance(*_compliance_args(request))
         return TaskResponse(**result)
+    except LLMUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.post("/fraud", response_model=TaskResponse)
-async def detect_fraud(request: FraudDetectionRequest):
+async def detect_fraud(
+    request: FraudDetectionRequest,
+    stream: bool = Query(False, description="Stream the solution as server-sent events")
+):
     """Detect fraud patterns."""
     try:
-        transaction = {
-            "type": request.transaction_type,
-            "amount": request.amount
-        }
-        
-        result = financial_service.detect_fraud(transaction, request.customer_history)
+        if stream:
+            return _event_stream(financial_service.astream_fraud(*_fraud_args(request)))
+        result = await financial_service.adetect_fraud(*_fraud_args(request))
         return TaskResponse(**result)
+    except LLMUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.post("/portfolio", response_model=TaskResponse)
-async def optimize_portfolio(request: PortfolioRequest):
+async def optimize_portfolio(
+    request: PortfolioRequest,
+    stream: bool = Query(False, description="Stream the solution as server-sent events")
+):
     """Optimize portfolio strategy."""
     try:
-        market_conditions = {
-            "trend": request.market_trend,
-            "volatility": request.volatility
-        }
-        portfolio = {
-            "value": request.portfolio_value,
-            "allocation": request.current_allocation
-        }
-        
-        result = financial_service.optimize_portfolio(market_conditions, portfolio)
+        if stream:
+            return _event_stream(financial_service.astream_portfolio(*_portfolio_args(request)))
+        result = await financial_service.aoptimize_portfolio(*_portfolio_args(request))
         return TaskResponse(**result)
+    except LLMUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/batch/solve", response_model=BatchResponse)
+async def solve_batch(request: BatchTaskRequest):
+    """Solve a batch of general tasks; errors are reported per item."""
+    try:
+        tasks = [
+            {"task": t.task, "task_type": t.task_type, "use_llm": t.use_llm}
+            for t in request.tasks
+        ]
+        results = await agent_service.asolve_batch(tasks, request.max_concurrency)
+        return _batch_response(results)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/batch/risk", response_model=BatchResponse)
+async def assess_risk_batch(request: BatchRiskAssessmentRequest):
+    """Assess risk for a batch of transactions."""
+    try:
+        items = [_risk_args(item) for item in request.items]
+        results = await financial_service.aassess_risk_batch(items, request.max_concurrency)
+        return _batch_response(results)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/batch/compliance", response_model=BatchResponse)
+async def check_compliance_batch(request: BatchComplianceRequest):
+    """Check compliance for a batch of transactions."""
+    try:
+        items = [_compliance_args(item) for item in request.items]
+        results = await financial_service.acheck_compliance_batch(items, request.max_concurrency)
+        return _batch_response(results)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/batch/fraud", response_model=BatchResponse)
+async def detect_fraud_batch(request: BatchFraudDetectionRequest):
+    """Detect fraud for a batch of transactions."""
+    try:
+        items = [_fraud_args(item) for item in request.items]
+        results = await financial_service.adetect_fraud_batch(items, request.max_concurrency)
+        return _batch_response(results)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/batch/portfolio", response_model=BatchResponse)
+async def optimize_portfolio_batch(request: BatchPortfolioRequest):
+    """Optimize a batch of portfolios."""
+    try:
+        items = [_portfolio_args(item) for item in request.items]
+        results = await financial_service.aoptimize_portfolio_batch(items, request.max_concurrency)
+        return _batch_response(results)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -147,21 +255,161 @@ async def get_stats():
 
 
 @router.get("/memories", response_model=MemoryListResponse)
-async def get_memories(limit: int = 10, task_type: Optional[str] = None):
-    """Get recent memories."""
+async def get_memories(
+    limit: int = Query(10, ge=1, le=1000),
+    task_type: Optional[str] = None,
+    success: Optional[bool] = None,
+    start: Optional[datetime] = Query(None, description="Only memories at or after this time"),
+    end: Optional[datetime] = Query(None, description="Only memories before this time"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    order: str = Query("desc", pattern="^(asc|desc)$")
+):
+    """Get recent memories, one page at a time."""
     try:
-        memories = memory_service.memories
-        
-        if task_type:
-            memories = [m for m in memories if m.task_type == task_type]
-        
-        memories = memories[-limit:]
+        after = decode_cursor(cursor) if cursor else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    try:
+        memories, matched, next_key = memory_service.page(
+            limit, task_type, success,
+            start_us=_timestamp_us(start),
+            end_us=_timestamp_us(end),
+            cursor=after,
+            newest_first=order == "desc"
+        )
         
         return MemoryListResponse(
             total=len(memory_service.memories),
             returned=len(memories),
-            memories=[m.to_api_dict() for m in memories]
+            memories=[m.to_api_dict() for m in memories],
+            matched=matched,
+            next_cursor=encode_cursor(next_key) if next_key else None
         )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+
+@router.get("/memories/export")
+async def export_memories(
+    store: str = Query("memory", pattern="^(memory|financial)$"),
+    task_type: Optional[str] = None,
+    success: Optional[bool] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None
+):
+    """Stream a memory store as NDJSON (one full entry per line, oldest first)."""
+    service = _memory_store(store)
+    lines = iter_export(service, task_type, success, _timestamp_us(start), _timestamp_us(end))
+    return StreamingResponse(
+        lines,
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="{service.memory_file.stem}.ndjson"'}
+    )
+
+
+@router.post("/memories/import", response_model=ImportResponse)
+async def import_memories(request: Request, store: str = Query("memory", pattern="^(memory|financial)$")):
+    """Import NDJSON memories in batches; evictions to stay within capacity are reported."""
+    try:
+        result = await aimport_chunks(_memory_store(store), request.stream())
+        return ImportResponse(**result)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/memories/consolidate", response_model=ConsolidationResponse)
+async def consolidate_memories(task_type: Optional[str] = None, max_distance: Optional[float] = None):
+    """Merge near-duplicate memories in every store."""
+    try:
+        results = [
+            await service.aconsolidate(max_distance, task_type)
+            for service in memory_services().values()
+        ]
+        return ConsolidationResponse(results=results)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+def _event_stream(events: AsyncIterator[Tuple[str, Dict[str, Any]]]) -> StreamingResponse:
+    """Server-sent events response for a streamed solve (context, token..., result)."""
+    async def frames():
+        try:
+            async for event, data in events:
+                if event == "result":
+                    data = TaskResponse(**data).model_dump()
+                yield f"event: {event}\ndata: {json.dumps(data)}\n\n"
+        except Exception as e:
+            yield f"event: error\ndata: {json.dumps({'detail': str(e)})}\n\n"
+    
+    return StreamingResponse(
+        frames(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+def _memory_store(name: str):
+    """MemoryService behind a store name."""
+    return get_memory_service(FINANCIAL_MEMORY_FILE if name == "financial" else MEMORY_FILE)
+
+
+def _timestamp_us(value: Optional[datetime]) -> Optional[int]:
+    """Query datetime as microseconds since the epoch."""
+    return int(value.timestamp() * 1_000_000) if value else None
+
+
+def _risk_args(request: RiskAssessmentRequest):
+    """(transaction, customer_profile) for FinancialService.assess_risk."""
+    transaction = {
+        "type": request.transaction_type,
+        "amount": request.amount
+    }
+    customer_profile = {
+        "tier": request.customer_tier,
+        "account_age_days": request.account_age_days
+    }
+    return transaction, customer_profile
+
+
+def _compliance_args(request: ComplianceRequest):
+    """(transaction, regulation) for FinancialService.check_compliance."""
+    transaction = {
+        "type": request.transaction_type,
+        "amount": request.amount,
+        "region": request.region
+    }
+    return transaction, request.regulation
+
+
+def _fraud_args(request: FraudDetectionRequest):
+    """(transaction, customer_history) for FinancialService.detect_fraud."""
+    transaction = {
+        "type": request.transaction_type,
+        "amount": request.amount
+    }
+    return transaction, request.customer_history
+
+
+def _portfolio_args(request: PortfolioRequest):
+    """(market_conditions, portfolio) for FinancialService.optimize_portfolio."""
+    market_conditions = {
+        "trend": request.market_trend,
+        "volatility": request.volatility
+    }
+    portfolio = {
+        "value": request.portfolio_value,
+        "allocation": request.current_allocation
+    }
+    return market_conditions, portfolio
+
+
+def _batch_response(results) -> BatchResponse:
+    """Wrap per-item batch results."""
+    succeeded = sum(1 for r in results if r["error"] is None)
+    return BatchResponse(
+        total=len(results),
+        succeeded=succeeded,
+        failed=len(results) - succeeded,
+        results=results
+    )
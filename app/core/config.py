@@ -18,17 +18,120 @@ ANTHROPIC_API_KEY = os.getenv("ANTHROPIC_API_KEY", "")
 LLM_PROVIDER = os.getenv("LLM_PROVIDER", "openai")
 LLM_MODEL = os.getenv("LLM_MODEL", "gpt-4o-mini")
 USE_MOCK_LLM = os.getenv("USE_MOCK_LLM", "true").lower() == "true"
+LLM_BASE_URL = os.getenv("LLM_BASE_URL", "")  # OpenAI-compatible endpoint (e.g. a local server)
+LLM_CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("LLM_CIRCUIT_FAILURE_THRESHOLD", "5"))
+LLM_CIRCUIT_RESET_SECONDS = float(os.getenv("LLM_CIRCUIT_RESET_SECONDS", "30"))
+
+# LLM client: provider clients are pooled per process; each call gets
+# LLM_TIMEOUT_SECONDS per attempt and LLM_DEADLINE_SECONDS in total, with up to
+# LLM_MAX_RETRIES jittered retries on timeouts, connection errors, 429 and 5xx.
+# LLM_HEDGE_AFTER_SECONDS > 0 sends a second request when the first is slower
+# than that (async calls only). When the provider fails or its circuit is open,
+# LLM_FALLBACK_PROVIDER ("mock", "openai", "anthropic"; "" = none) answers.
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "30"))
+LLM_DEADLINE_SECONDS = float(os.getenv("LLM_DEADLINE_SECONDS", "60"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+LLM_RETRY_BACKOFF_SECONDS = float(os.getenv("LLM_RETRY_BACKOFF_SECONDS", "0.5"))
+LLM_HEDGE_AFTER_SECONDS = float(os.getenv("LLM_HEDGE_AFTER_SECONDS", "0"))
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "100"))
+LLM_FALLBACK_PROVIDER = os.getenv("LLM_FALLBACK_PROVIDER", "")
+LLM_FALLBACK_MODEL = os.getenv("LLM_FALLBACK_MODEL", "")
+
+# Several backends: comma-separated "[name=]provider:model[@base_url]" entries
+# ("local:<model>@<url>" for OpenAI-compatible servers); calls go to the backend
+# with the best rolling latency / error rate / load over LLM_ROUTER_WINDOW calls.
+# LLM_ROUTES pins task types to backend names, e.g.
+# "risk_assessment=openai:gpt-4o-mini|local:llama3;portfolio_optimization=openai:gpt-4o"
+LLM_BACKENDS = os.getenv("LLM_BACKENDS", "")
+LLM_ROUTES = os.getenv("LLM_ROUTES", "")
+LLM_ROUTER_WINDOW = int(os.getenv("LLM_ROUTER_WINDOW", "100"))
+
+# LLM response cache (in-memory LRU + optional SQLite tier, e.g. data/llm_cache.sqlite)
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "1024"))
+LLM_CACHE_TTL_SECONDS = float(os.getenv("LLM_CACHE_TTL_SECONDS", "3600"))
+LLM_CACHE_SQLITE_PATH = os.getenv("LLM_CACHE_SQLITE_PATH", "")
+
+# Semantic answer cache: reuse a recent successful solution for a near-duplicate
+# task of the same type (distance is squared L2 between normalized embeddings)
+SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE_ENABLED", "false").lower() == "true"
+SEMANTIC_CACHE_MAX_DISTANCE = float(os.getenv("SEMANTIC_CACHE_MAX_DISTANCE", "0.05"))
+SEMANTIC_CACHE_MAX_ENTRIES = int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "256"))
+SEMANTIC_CACHE_TTL_SECONDS = float(os.getenv("SEMANTIC_CACHE_TTL_SECONDS", "3600"))
 
 # Vector Database
 EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
 VECTOR_DIM = 384
-FAISS_INDEX_PATH = BASE_DIR / "data" / "memory_index.faiss"
+FAISS_INDEX_SUFFIX = ".faiss"  # each memory file gets its own index, e.g. memory.faiss
+EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "4096"))  # in-memory LRU, per store
+
+# Vector index backend: "flat" (exact), "ivf_flat", "ivf_pq" or "hnsw".
+# Each (task_type, success) partition starts as an exact flat index and is
+# trained/migrated to the backend once it holds VECTOR_INDEX_SWITCHOVER vectors.
+VECTOR_INDEX_TYPE = os.getenv("VECTOR_INDEX_TYPE", "hnsw")
+VECTOR_INDEX_SWITCHOVER = int(os.getenv("VECTOR_INDEX_SWITCHOVER", "50000"))
+IVF_NLIST = int(os.getenv("IVF_NLIST", "0"))  # 0 = 4 * sqrt(partition size)
+IVF_NPROBE = int(os.getenv("IVF_NPROBE", "16"))
+PQ_M = int(os.getenv("PQ_M", "48"))  # sub-quantizers, must divide VECTOR_DIM
+PQ_NBITS = int(os.getenv("PQ_NBITS", "8"))
+HNSW_M = int(os.getenv("HNSW_M", "32"))
+HNSW_EF_CONSTRUCTION = int(os.getenv("HNSW_EF_CONSTRUCTION", "80"))
+HNSW_EF_SEARCH = int(os.getenv("HNSW_EF_SEARCH", "64"))
 
 # Memory Configuration
 MEMORY_FILE = BASE_DIR / "data" / "memory.json"
 FINANCIAL_MEMORY_FILE = BASE_DIR / "data" / "financial_memory.json"
-MAX_MEMORY_ENTRIES = 1000
+MAX_MEMORY_ENTRIES = int(os.getenv("MAX_MEMORY_ENTRIES", "1000"))  # 0 = unbounded
+# Eviction policy once a store exceeds MAX_MEMORY_ENTRIES: "lru" (by retrieval),
+# "oldest", "failure_first" or "utility". Each eviction frees EVICTION_HEADROOM
+# of the capacity so the snapshot rewrite is amortized over many adds.
+MEMORY_EVICTION_POLICY = os.getenv("MEMORY_EVICTION_POLICY", "utility")
+MEMORY_EVICTION_HEADROOM = float(os.getenv("MEMORY_EVICTION_HEADROOM", "0.1"))
+# Consolidation merges memories of the same task_type whose embeddings lie within
+# CONSOLIDATION_MAX_DISTANCE (squared L2, normalized); runs every
+# CONSOLIDATION_INTERVAL_SECONDS in the background (0 = only on demand).
+# Candidates are the CONSOLIDATION_NEIGHBOURS nearest memories from the vector
+# index, searched CONSOLIDATION_BATCH_SIZE memories at a time.
+CONSOLIDATION_MAX_DISTANCE = float(os.getenv("CONSOLIDATION_MAX_DISTANCE", "0.1"))
+CONSOLIDATION_INTERVAL_SECONDS = float(os.getenv("CONSOLIDATION_INTERVAL_SECONDS", "0"))
+CONSOLIDATION_NEIGHBOURS = int(os.getenv("CONSOLIDATION_NEIGHBOURS", "32"))
+CONSOLIDATION_BATCH_SIZE = int(os.getenv("CONSOLIDATION_BATCH_SIZE", "256"))
+# Rolling success-rate windows reported by /stats, in seconds
+STATS_WINDOWS_SECONDS = [int(s) for s in os.getenv("STATS_WINDOWS_SECONDS", "3600,86400,604800").split(",") if s]
 TOP_K_RETRIEVAL = int(os.getenv("TOP_K_RETRIEVAL", "5"))
+# Retrieval: "vector", "text" (BM25) or "hybrid". Hybrid takes HYBRID_CANDIDATES
+# hits from each retriever and fuses them by reciprocal rank ("rrf", constant
+# HYBRID_RRF_K) or min-max normalized scores ("weighted"); HYBRID_VECTOR_WEIGHT
+# is the vector share (BM25 gets the rest). With RERANKER_MODEL set (e.g.
+# cross-encoder/ms-marco-MiniLM-L-6-v2) the fused top RERANK_TOP_N are rescored
+# by that local cross-encoder.
+RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "vector")
+HYBRID_CANDIDATES = int(os.getenv("HYBRID_CANDIDATES", "50"))
+HYBRID_FUSION = os.getenv("HYBRID_FUSION", "rrf")
+HYBRID_RRF_K = int(os.getenv("HYBRID_RRF_K", "60"))
+HYBRID_VECTOR_WEIGHT = float(os.getenv("HYBRID_VECTOR_WEIGHT", "0.5"))
+RERANKER_MODEL = os.getenv("RERANKER_MODEL", "")
+RERANK_TOP_N = int(os.getenv("RERANK_TOP_N", "20"))
+# Prompt context: retrieved memories are rendered once into snippets (task and
+# solution shortened to CONTEXT_SNIPPET_MAX_TOKENS), cached, and packed by rank
+# and success rate into CONTEXT_MAX_TOKENS (estimated at ~4 characters per token)
+CONTEXT_MAX_TOKENS = int(os.getenv("CONTEXT_MAX_TOKENS", "1500"))
+CONTEXT_SNIPPET_MAX_TOKENS = int(os.getenv("CONTEXT_SNIPPET_MAX_TOKENS", "200"))
+CONTEXT_CACHE_SIZE = int(os.getenv("CONTEXT_CACHE_SIZE", "2048"))
+MEMORY_WAL_FSYNC_EVERY = int(os.getenv("MEMORY_WAL_FSYNC_EVERY", "16"))
+MEMORY_COMPACT_EVERY = int(os.getenv("MEMORY_COMPACT_EVERY", "500"))
+
+# Concurrency: threads for embedding/vector search; memory writes use one
+# dedicated thread so appends to a store are serialized.
+ENCODE_WORKERS = int(os.getenv("ENCODE_WORKERS", "4"))
+
+# NDJSON export/import: memories per export page and per import batch
+EXPORT_PAGE_SIZE = int(os.getenv("EXPORT_PAGE_SIZE", "1000"))
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "256"))
+
+# Batch solving
+BATCH_MAX_SIZE = int(os.getenv("BATCH_MAX_SIZE", "100"))
+BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", "8"))  # concurrent LLM calls per batch
 
 # API Configuration
 API_HOST = os.getenv("API_HOST", "0.0.0.0")
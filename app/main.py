@@ -1,16 +1,44 @@
 """FastAPI application main file."""
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from app.core.config import API_TITLE, API_VERSION, API_DESCRIPTION
+from app.core.config import API_TITLE, API_VERSION, API_DESCRIPTION, CONSOLIDATION_INTERVAL_SECONDS
 from app.api.v1.endpoints import router as v1_router
+from app.services.registry import memory_services
+
+
+async def consolidate_periodically(interval: float):
+    """Background job: merge near-duplicate memories in every store."""
+    while True:
+        await asyncio.sleep(interval)
+        for service in memory_services().values():
+            try:
+                await service.aconsolidate()
+            except Exception as e:
+                print(f"⚠️  Consolidation failed for {service.memory_file.name}: {e}")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start and stop background jobs."""
+    task = None
+    if CONSOLIDATION_INTERVAL_SECONDS > 0:
+        task = asyncio.create_task(consolidate_periodically(CONSOLIDATION_INTERVAL_SECONDS))
+    yield
+    if task:
+        task.cancel()
+
 
 app = FastAPI(
     title=API_TITLE,
     version=API_VERSION,
     description=API_DESCRIPTION,
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    lifespan=lifespan
 )
 
 # CORS middleware
@@ -34,14 +62,18 @@ async def root():
         "version": API_VERSION,
         "docs": "/docs",
         "health": "/api/v1/health",
+        "live": "/api/v1/live",
+        "ready": "/api/v1/ready",
         "endpoints": {
             "solve": "POST /api/v1/solve",
             "risk": "POST /api/v1/risk",
             "compliance": "POST /api/v1/compliance",
             "fraud": "POST /api/v1/fraud",
             "portfolio": "POST /api/v1/portfolio",
+            "batch": "POST /api/v1/batch/{solve,risk,compliance,fraud,portfolio}",
             "stats": "GET /api/v1/stats",
-            "memories": "GET /api/v1/memories"
+            "memories": "GET /api/v1/memories",
+            "consolidate": "POST /api/v1/memories/consolidate"
         }
     }
 
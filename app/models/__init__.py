@@ -6,9 +6,15 @@ from app.models.requests import (
     ComplianceRequest,
     FraudDetectionRequest,
     PortfolioRequest,
+    BatchTaskRequest,
+    BatchRiskAssessmentRequest,
+    BatchComplianceRequest,
+    BatchFraudDetectionRequest,
+    BatchPortfolioRequest,
 )
 from app.models.responses import (
     TaskResponse,
+    BatchResponse,
     StatsResponse,
     MemoryListResponse,
 )
@@ -20,7 +26,13 @@ __all__ = [
     "ComplianceRequest",
     "FraudDetectionRequest",
     "PortfolioRequest",
+    "BatchTaskRequest",
+    "BatchRiskAssessmentRequest",
+    "BatchComplianceRequest",
+    "BatchFraudDetectionRequest",
+    "BatchPortfolioRequest",
     "TaskResponse",
+    "BatchResponse",
     "StatsResponse",
     "MemoryListResponse",
 ]
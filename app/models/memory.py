@@ -1,22 +1,57 @@
 """Memory data models."""
-from dataclasses import dataclass, asdict
-from typing import List, Dict
+import sys
+from typing import List, Dict, Optional
 from datetime import datetime
 
 
-@dataclass
 class MemoryEntry:
-    """Represents a single memory entry with experience."""
-    task: str
-    solution: str
-    success: bool
-    reasoning: str
-    timestamp: str
-    task_type: str
-    key_insights: List[str]
+    """
+    Represents a single memory entry with experience.
+    
+    Uses ``__slots__`` instead of a per-instance ``__dict__``, and interns
+    ``task_type`` and insight strings, which repeat across most entries, so
+    large stores stay compact.
+    """
+    
+    __slots__ = ("task", "solution", "success", "reasoning", "timestamp", "task_type",
+                 "key_insights", "attempts", "successes")
+    
+    def __init__(self, task: str, solution: str, success: bool, reasoning: str, timestamp: str,
+                 task_type: str, key_insights: List[str], attempts: int = 1,
+                 successes: Optional[int] = None):
+        self.task = task
+        self.solution = solution
+        self.success = success
+        self.reasoning = reasoning
+        self.timestamp = timestamp
+        self.task_type = sys.intern(task_type)
+        self.key_insights = [sys.intern(insight) for insight in key_insights]
+        self.attempts = attempts
+        # A single experience counts as one attempt with its own outcome;
+        # consolidated entries carry aggregated counts.
+        self.successes = int(bool(success)) if successes is None else successes
+    
+    def __eq__(self, other) -> bool:
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+    
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"MemoryEntry({fields})"
     
     def to_dict(self) -> Dict:
-        return asdict(self)
+        return {
+            "task": self.task,
+            "solution": self.solution,
+            "success": self.success,
+            "reasoning": self.reasoning,
+            "timestamp": self.timestamp,
+            "task_type": self.task_type,
+            "key_insights": list(self.key_insights),
+            "attempts": self.attempts,
+            "successes": self.successes
+        }
     
     @classmethod
     def from_dict(cls, data: Dict) -> 'MemoryEntry':
@@ -30,6 +65,8 @@ class MemoryEntry:
             "success": self.success,
             "task_type": self.task_type,
             "timestamp": self.timestamp,
-            "key_insights": self.key_insights
+            "key_insights": self.key_insights,
+            "attempts": self.attempts,
+            "successes": self.successes
         }
 
@@ -2,6 +2,8 @@
 from pydantic import BaseModel, Field
 from typing import List, Dict, Any, Optional
 
+from app.core.config import BATCH_MAX_SIZE
+
 
 class TaskRequest(BaseModel):
     """General task request."""
@@ -40,3 +42,33 @@ class PortfolioRequest(BaseModel):
     portfolio_value: float = Field(..., description="Portfolio value", gt=0)
     current_allocation: Optional[str] = Field(default="60/40", description="Current allocation (equity/bonds)")
 
+
+
+class BatchTaskRequest(BaseModel):
+    """Batch of general tasks."""
+    tasks: List[TaskRequest] = Field(..., min_length=1, max_length=BATCH_MAX_SIZE, description="Tasks to solve")
+    max_concurrency: Optional[int] = Field(default=None, ge=1, description="Maximum concurrent LLM calls")
+
+
+class BatchRiskAssessmentRequest(BaseModel):
+    """Batch of risk assessment requests."""
+    items: List[RiskAssessmentRequest] = Field(..., min_length=1, max_length=BATCH_MAX_SIZE)
+    max_concurrency: Optional[int] = Field(default=None, ge=1, description="Maximum concurrent LLM calls")
+
+
+class BatchComplianceRequest(BaseModel):
+    """Batch of compliance check requests."""
+    items: List[ComplianceRequest] = Field(..., min_length=1, max_length=BATCH_MAX_SIZE)
+    max_concurrency: Optional[int] = Field(default=None, ge=1, description="Maximum concurrent LLM calls")
+
+
+class BatchFraudDetectionRequest(BaseModel):
+    """Batch of fraud detection requests."""
+    items: List[FraudDetectionRequest] = Field(..., min_length=1, max_length=BATCH_MAX_SIZE)
+    max_concurrency: Optional[int] = Field(default=None, ge=1, description="Maximum concurrent LLM calls")
+
+
+class BatchPortfolioRequest(BaseModel):
+    """Batch of portfolio optimization requests."""
+    items: List[PortfolioRequest] = Field(..., min_length=1, max_length=BATCH_MAX_SIZE)
+    max_concurrency: Optional[int] = Field(default=None, ge=1, description="Maximum concurrent LLM calls")
@@ -11,6 +11,22 @@ class TaskResponse(BaseModel):
     context_used: int = Field(..., description="Number of past experiences used")
     memory_size: int = Field(..., description="Total number of memories")
     retrieved_experiences: List[Dict[str, Any]] = Field(default_factory=list, description="Retrieved experiences")
+    served_from_cache: bool = Field(False, description="Solution reused from a near-duplicate task instead of the LLM")
+
+
+class BatchItemResult(BaseModel):
+    """Outcome of one item in a batch request."""
+    index: int
+    result: Optional[TaskResponse] = None
+    error: Optional[str] = None
+
+
+class BatchResponse(BaseModel):
+    """Batch solve response, in request order."""
+    total: int
+    succeeded: int
+    failed: int
+    results: List[BatchItemResult]
 
 
 class StatsResponse(BaseModel):
@@ -20,6 +36,8 @@ class StatsResponse(BaseModel):
     failed: int
     success_rate: float
     task_types: Dict[str, int]
+    task_type_stats: Dict[str, Dict[str, Any]] = Field(default_factory=dict, description="Totals and success rate per task type")
+    windows: Dict[str, Dict[str, Any]] = Field(default_factory=dict, description="Success rate of tasks solved in rolling windows, e.g. 1h/1d/7d")
     vector_index_size: int
     using_vector_search: bool
 
@@ -29,6 +47,31 @@ class MemoryListResponse(BaseModel):
     total: int
     returned: int
     memories: List[Dict[str, Any]]
+    matched: Optional[int] = Field(default=None, description="Memories matching the filters and time range")
+    next_cursor: Optional[str] = Field(default=None, description="Pass as cursor to fetch the next page")
+
+
+class ImportResponse(BaseModel):
+    """NDJSON import summary."""
+    imported: int
+    failed: int
+    errors: List[str] = Field(default_factory=list, description="First errors, by line number")
+    evicted: int = Field(0, description="Memories evicted from the store while importing (the store keeps at most max_entries)")
+    memories: int = Field(0, description="Store size after the import")
+    warning: Optional[str] = Field(default=None, description="Set when the import overflowed the store's capacity")
+
+
+class ConsolidationResult(BaseModel):
+    """Outcome of consolidating one memory store."""
+    memory_file: str
+    before: int
+    after: int
+    clusters: int = Field(..., description="Clusters of near-duplicates merged")
+
+
+class ConsolidationResponse(BaseModel):
+    """Consolidation response, one result per memory store."""
+    results: List[ConsolidationResult]
 
 
 class HealthResponse(BaseModel):
@@ -38,3 +81,36 @@ class HealthResponse(BaseModel):
     vector_search_available: bool
     llm_available: bool
 
+
+
+class LivenessResponse(BaseModel):
+    """Liveness probe response."""
+    status: str
+
+
+class StoreStatus(BaseModel):
+    """Cached state of one memory store."""
+    memory_file: str
+    memories: int
+    index_size: int
+    index_backends: Dict[str, int] = Field(default_factory=dict, description="Partitions per index backend")
+    encoder_loaded: bool
+    using_vector_search: bool
+    last_persist_at: Optional[str] = None
+    embedding_cache: Optional[Dict[str, Any]] = Field(default=None, description="Embedding LRU hit/miss counters")
+    text_index: Optional[Dict[str, Any]] = Field(default=None, description="BM25 index size")
+    retrieval_mode: Optional[str] = Field(default=None, description="vector, text or hybrid")
+    reranker: Optional[str] = Field(default=None, description="Cross-encoder reranking hybrid results, if any")
+
+
+class ReadinessResponse(BaseModel):
+    """Readiness probe response."""
+    status: str
+    ready: bool
+    stores: List[StoreStatus]
+    llm_provider: str
+    llm_model: str
+    llm_circuit_state: str
+    llm_cache: Optional[Dict[str, Any]] = Field(default=None, description="LLM response cache hit/miss counters")
+    llm_backends: List[Dict[str, Any]] = Field(default_factory=list, description="Per-backend circuit state and rolling p50/p95 latency")
+    agent_caches: Dict[str, Dict[str, Any]] = Field(default_factory=dict, description="Per-agent (general, financial) semantic cache and context snippet cache hit/miss counters")
@@ -1,11 +1,20 @@
 """Evo-Memory Agent service - Core business logic."""
-from typing import Dict, List, Any, Optional
+import asyncio
+from typing import Dict, List, Any, Optional, AsyncIterator, Tuple
 from datetime import datetime
 
 from app.models.memory import MemoryEntry
+from app.services.context_builder import ContextBuilder
 from app.services.llm_service import LLMService
 from app.services.memory_service import MemoryService
-from app.core.config import MEMORY_FILE, TOP_K_RETRIEVAL
+from app.services.registry import get_llm_service, get_memory_service
+from app.services.semantic_cache import SemanticCache
+from app.utils.executors import run_in_encode_pool
+from app.core.config import (
+    MEMORY_FILE, TOP_K_RETRIEVAL, BATCH_MAX_CONCURRENCY, SEMANTIC_CACHE_ENABLED,
+    SEMANTIC_CACHE_MAX_DISTANCE, SEMANTIC_CACHE_MAX_ENTRIES, SEMANTIC_CACHE_TTL_SECONDS,
+    CONTEXT_MAX_TOKENS, CONTEXT_SNIPPET_MAX_TOKENS, CONTEXT_CACHE_SIZE
+)
 
 
 class AgentService:
@@ -14,8 +23,13 @@ class AgentService:
     """
     
     def __init__(self, llm_service: LLMService = None, memory_service: MemoryService = None):
-        self.llm = llm_service or LLMService()
-        self.memory = memory_service or MemoryService()
+        self.llm = llm_service or get_llm_service()
+        self.memory = memory_service or get_memory_service(MEMORY_FILE)
+        self.context_builder = ContextBuilder(CONTEXT_MAX_TOKENS, CONTEXT_SNIPPET_MAX_TOKENS, CONTEXT_CACHE_SIZE)
+        self.semantic_cache = None
+        if SEMANTIC_CACHE_ENABLED and self.memory.use_vector:
+            self.semantic_cache = SemanticCache(SEMANTIC_CACHE_MAX_DISTANCE, SEMANTIC_CACHE_MAX_ENTRIES,
+                                                SEMANTIC_CACHE_TTL_SECONDS)
     
     def solve_task(self, task: str, task_type: str = "general", use_llm: bool = True) -> Dict[str, Any]:
         """
@@ -29,6 +43,12 @@ class AgentService:
         Returns:
             Dict with task, solution, success, and metadata
         """
+        # Step 0: Reuse a recent answer to a near-duplicate task
+        embedding = self._task_embedding(task) if use_llm else None
+        cached = self._cache_lookup(task_type, embedding)
+        if cached is not None:
+            return self._build_result(task, cached, [cached], served_from_cache=True)
+        
         # Step 1: Search
         retrieved = self.memory.search(task, task_type, top_k=TOP_K_RETRIEVAL)
         
@@ -37,19 +57,201 @@ class AgentService:
         
         # Step 3: Solve
         if use_llm:
-            system_prompt = f"""You are a financial services AI assistant specializing in {task_type}.
-Use the provided context from past experiences to solve the current task accurately.
-Focus on patterns, strategies, and lessons learned from past experiences."""
-            solution = self.llm.generate(context, system_prompt, max_tokens=500)
+            solution = self.llm.generate(context, self._system_prompt(task_type), max_tokens=500,
+                                         task_type=task_type)
+        else:
+            solution = self._simple_solve(task, retrieved)
+        
+        # Step 4: Evolve
+        new_memory = self._build_memory(task, task_type, solution, retrieved)
+        self.memory.add_memory(new_memory)
+        self._cache_store(task_type, embedding, new_memory)
+        
+        return self._build_result(task, new_memory, retrieved)
+    
+    async def asolve_task(self, task: str, task_type: str = "general", use_llm: bool = True) -> Dict[str, Any]:
+        """
+        Async variant of solve_task for the API request path.
+        
+        Encoding, vector search and persistence run on bounded executors and
+        the LLM call uses the provider's async client, so concurrent requests
+        overlap instead of blocking the event loop.
+        """
+        # Step 0: Reuse a recent answer to a near-duplicate task
+        embedding = await run_in_encode_pool(self._task_embedding, task) if use_llm else None
+        cached = self._cache_lookup(task_type, embedding)
+        if cached is not None:
+            return self._build_result(task, cached, [cached], served_from_cache=True)
+        
+        # Step 1: Search
+        retrieved = await self.memory.asearch(task, task_type, top_k=TOP_K_RETRIEVAL)
+        
+        # Step 2: Synthesize
+        context = self._synthesize_context(task, retrieved)
+        
+        # Step 3: Solve
+        if use_llm:
+            solution = await self.llm.agenerate(context, self._system_prompt(task_type), max_tokens=500,
+                                               task_type=task_type)
+        else:
+            solution = self._simple_solve(task, retrieved)
+        
+        # Step 4: Evolve
+        new_memory = self._build_memory(task, task_type, solution, retrieved)
+        await self.memory.aadd_memory(new_memory)
+        self._cache_store(task_type, embedding, new_memory)
+        
+        return self._build_result(task, new_memory, retrieved)
+    
+    async def astream_task(self, task: str, task_type: str = "general",
+                           use_llm: bool = True) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Streaming variant of asolve_task yielding ``(event, data)`` pairs.
+        
+        Yields ``("context", ...)`` once retrieval is done, ``("token", {"text"})``
+        for each piece of the solution as the provider streams it, and
+        ``("result", ...)`` with the full result after the evolve step, which
+        only runs once the solution is complete.
+        """
+        # Step 0: Reuse a recent answer to a near-duplicate task
+        embedding = await run_in_encode_pool(self._task_embedding, task) if use_llm else None
+        cached = self._cache_lookup(task_type, embedding)
+        if cached is not None:
+            yield "context", self._context_event([cached])
+            yield "token", {"text": cached.solution}
+            yield "result", self._build_result(task, cached, [cached], served_from_cache=True)
+            return
+        
+        # Step 1: Search
+        retrieved = await self.memory.asearch(task, task_type, top_k=TOP_K_RETRIEVAL)
+        yield "context", self._context_event(retrieved)
+        
+        # Step 2: Synthesize
+        context = self._synthesize_context(task, retrieved)
+        
+        # Step 3: Solve, forwarding text as it arrives
+        if use_llm:
+            parts = []
+            async for text in self.llm.astream(context, self._system_prompt(task_type), max_tokens=500,
+                                             task_type=task_type):
+                parts.append(text)
+                yield "token", {"text": text}
+            solution = "".join(parts)
         else:
             solution = self._simple_solve(task, retrieved)
+            yield "token", {"text": solution}
         
         # Step 4: Evolve
+        new_memory = self._build_memory(task, task_type, solution, retrieved)
+        await self.memory.aadd_memory(new_memory)
+        self._cache_store(task_type, embedding, new_memory)
+        
+        yield "result", self._build_result(task, new_memory, retrieved)
+    
+    async def asolve_batch(self, tasks: List[Dict[str, Any]],
+                           max_concurrency: int = None) -> List[Dict[str, Any]]:
+        """
+        Solve many tasks with batched retrieval and a single memory commit.
+        
+        Args:
+            tasks: Dicts with ``task`` and optional ``task_type`` / ``use_llm``
+            max_concurrency: Maximum concurrent LLM calls
+        
+        Returns:
+            One ``{"index", "result", "error"}`` dict per task, in input order
+        """
+        if not tasks:
+            return []
+        
+        task_types = [item.get("task_type", "general") for item in tasks]
+        
+        # Step 0: Reuse recent answers to near-duplicate tasks (one encode call)
+        embeddings = [None] * len(tasks)
+        llm_rows = [i for i, item in enumerate(tasks) if item.get("use_llm", True)]
+        if self.semantic_cache is not None and llm_rows:
+            matrix = await run_in_encode_pool(self.memory.encode_queries, [tasks[i]["task"] for i in llm_rows])
+            if matrix is not None:
+                for i, row in zip(llm_rows, matrix):
+                    embeddings[i] = row
+        cached = [self._cache_lookup(t, e) for t, e in zip(task_types, embeddings)]
+        pending = [i for i, hit in enumerate(cached) if hit is None]
+        
+        # Step 1: Search (one encode call, one multi-row index search)
+        retrieved_lists = await self.memory.asearch_batch(
+            [tasks[i]["task"] for i in pending], [task_types[i] for i in pending], top_k=TOP_K_RETRIEVAL
+        ) if pending else []
+        
+        # Step 2 + 3: Synthesize and solve, with bounded LLM fan-out
+        semaphore = asyncio.Semaphore(max_concurrency or BATCH_MAX_CONCURRENCY)
+        
+        async def solve_one(item: Dict[str, Any], task_type: str, retrieved: List[MemoryEntry]) -> MemoryEntry:
+            task = item["task"]
+            if item.get("use_llm", True):
+                context = self._synthesize_context(task, retrieved)
+                async with semaphore:
+                    solution = await self.llm.agenerate(context, self._system_prompt(task_type),
+                                                        max_tokens=500, task_type=task_type)
+            else:
+                solution = self._simple_solve(task, retrieved)
+            return self._build_memory(task, task_type, solution, retrieved)
+        
+        outcomes = await asyncio.gather(
+            *[solve_one(tasks[i], task_types[i], retrieved)
+              for i, retrieved in zip(pending, retrieved_lists)],
+            return_exceptions=True
+        )
+        
+        # Step 4: Evolve (one encode call, one index insert, one log append)
+        await self.memory.aadd_memories([o for o in outcomes if isinstance(o, MemoryEntry)])
+        
+        results = [
+            {"index": i, "result": self._build_result(tasks[i]["task"], hit, [hit], served_from_cache=True),
+             "error": None}
+            for i, hit in enumerate(cached) if hit is not None
+        ]
+        for i, outcome, retrieved in zip(pending, outcomes, retrieved_lists):
+            if isinstance(outcome, MemoryEntry):
+                self._cache_store(task_types[i], embeddings[i], outcome)
+                results.append({"index": i, "result": self._build_result(tasks[i]["task"], outcome, retrieved),
+                                "error": None})
+            else:
+                results.append({"index": i, "result": None, "error": str(outcome)})
+        results.sort(key=lambda r: r["index"])
+        return results
+    
+    def _task_embedding(self, task: str):
+        """Embedding of a task for the semantic cache, or None when it is off."""
+        if self.semantic_cache is None:
+            return None
+        embeddings = self.memory.encode_queries([task])
+        return None if embeddings is None else embeddings[0]
+    
+    def _cache_lookup(self, task_type: str, embedding) -> Optional[MemoryEntry]:
+        """Cached memory for a near-duplicate task, if any."""
+        if self.semantic_cache is None or embedding is None:
+            return None
+        hit = self.semantic_cache.lookup(task_type, embedding)
+        return hit[0] if hit else None
+    
+    def _cache_store(self, task_type: str, embedding, memory: MemoryEntry):
+        """Make a successful memory available to the semantic cache."""
+        if self.semantic_cache is not None and embedding is not None:
+            self.semantic_cache.add(task_type, embedding, memory)
+    
+    def _system_prompt(self, task_type: str) -> str:
+        """System prompt for the solve step."""
+        return f"""You are a financial services AI assistant specializing in {task_type}.
+Use the provided context from past experiences to solve the current task accurately.
+Focus on patterns, strategies, and lessons learned from past experiences."""
+    
+    def _build_memory(self, task: str, task_type: str, solution: str,
+                      retrieved: List[MemoryEntry]) -> MemoryEntry:
+        """Evaluate a solution and turn it into a new memory entry."""
         success = self._evaluate_solution(task, solution)
         reasoning = f"Based on {len(retrieved)} past experiences"
         insights = self._extract_insights(task, solution, retrieved)
         
-        new_memory = MemoryEntry(
+        return MemoryEntry(
             task=task,
             solution=solution,
             success=success,
@@ -58,15 +260,24 @@ Focus on patterns, strategies, and lessons learned from past experiences."""
             task_type=task_type,
             key_insights=insights
         )
-        
-        self.memory.add_memory(new_memory)
-        
+    
+    def _build_result(self, task: str, memory: MemoryEntry, retrieved: List[MemoryEntry],
+                      served_from_cache: bool = False) -> Dict[str, Any]:
+        """Build the API result for ``task`` from the memory holding its solution."""
         return {
             "task": task,
-            "solution": solution,
-            "success": success,
-            "context_used": len(retrieved),
+            "solution": memory.solution,
+            "success": memory.success,
             "memory_size": len(self.memory.memories),
+            **self._context_event(retrieved),
+            "served_from_cache": served_from_cache
+        }
+    
+    @staticmethod
+    def _context_event(retrieved: List[MemoryEntry]) -> Dict[str, Any]:
+        """Retrieval summary sent before a streamed solution."""
+        return {
+            "context_used": len(retrieved),
             "retrieved_experiences": [
                 {"task": m.task[:100], "success": m.success, "task_type": m.task_type}
                 for m in retrieved
@@ -74,26 +285,8 @@ Focus on patterns, strategies, and lessons learned from past experiences."""
         }
     
     def _synthesize_context(self, task: str, retrieved: List[MemoryEntry]) -> str:
-        """Synthesize context from retrieved memories."""
-        if not retrieved:
-            return f"Task: {task}\n\nNo relevant past experiences found."
-        
-        context = f"Task: {task}\n\n"
-        context += "Relevant Past Experiences:\n"
-        context += "=" * 50 + "\n"
-        
-        for i, memory in enumerate(retrieved, 1):
-            status = "✅ SUCCESS" if memory.success else "❌ FAILURE"
-            context += f"\nExperience {i} ({status}):\n"
-            context += f"Task: {memory.task}\n"
-            context += f"Solution: {memory.solution}\n"
-            context += f"Reasoning: {memory.reasoning}\n"
-            if memory.key_insights:
-                context += f"Key Insights: {', '.join(memory.key_insights)}\n"
-            context += "-" * 50 + "\n"
-        
-        context += "\nBased on these experiences, apply similar strategies to solve the current task.\n"
-        return context
+        """Synthesize context from retrieved memories within the token budget."""
+        return self.context_builder.build(task, retrieved)
     
     def _simple_solve(self, task: str, retrieved: List[MemoryEntry]) -> str:
         """Simple solver fallback."""
@@ -132,4 +325,11 @@ Focus on patterns, strategies, and lessons learned from past experiences."""
     def get_stats(self) -> Dict:
         """Get agent statistics."""
         return self.memory.get_stats()
+    
+    def cache_stats(self) -> Dict[str, Any]:
+        """Hit/miss counters of the agent's caches (None when a cache is disabled)."""
+        return {
+            "semantic_cache": self.semantic_cache.stats() if self.semantic_cache else None,
+            "context_snippets": self.context_builder.stats(),
+        }
 
@@ -0,0 +1,56 @@
+"""Clustering and merging of near-duplicate memories."""
+from collections import Counter
+from typing import List
+
+from app.models.memory import MemoryEntry
+
+MAX_MERGED_INSIGHTS = 10
+
+
+def cluster_near_duplicates(neighbours: List[List[int]]) -> List[List[int]]:
+    """
+    Greedy leader clustering over near-duplicate candidates.
+    
+    ``neighbours[row]`` lists the rows within the distance threshold of
+    ``row``. Leaders are taken newest first (last row first) and claim their
+    unassigned neighbours. Returns clusters of two or more row positions.
+    """
+    assigned = [False] * len(neighbours)
+    clusters = []
+    for leader in range(len(neighbours) - 1, -1, -1):
+        if assigned[leader]:
+            continue
+        members = sorted({leader, *(n for n in neighbours[leader] if not assigned[n])})
+        for member in members:
+            assigned[member] = True
+        if len(members) > 1:
+            clusters.append(members)
+    return clusters
+
+
+def merge_memories(memories: List[MemoryEntry]) -> MemoryEntry:
+    """
+    Merge a cluster into one representative entry.
+    
+    The task and solution come from the most recent successful member (or
+    the most recent one if none succeeded); attempts and successes are
+    summed, and the most common insights across the cluster are kept.
+    """
+    ordered = sorted(memories, key=lambda m: m.timestamp)
+    successful = [m for m in ordered if m.success]
+    representative = (successful or ordered)[-1]
+    attempts = sum(m.attempts for m in memories)
+    successes = sum(m.successes for m in memories)
+    insights = Counter(insight for m in ordered for insight in dict.fromkeys(m.key_insights))
+    
+    return MemoryEntry(
+        task=representative.task,
+        solution=representative.solution,
+        success=2 * successes >= attempts,
+        reasoning=f"Consolidated from {attempts} similar experiences ({successes} successful)",
+        timestamp=ordered[-1].timestamp,
+        task_type=representative.task_type,
+        key_insights=[insight for insight, _ in insights.most_common(MAX_MERGED_INSIGHTS)],
+        attempts=attempts,
+        successes=successes
+    )
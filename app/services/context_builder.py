@@ -0,0 +1,143 @@
+"""Token-budgeted prompt context built from retrieved memories."""
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Tuple
+
+from app.models.memory import MemoryEntry
+from app.utils.cache_stats import hit_stats
+
+SEPARATOR = "-" * 50
+MAX_SNIPPET_INSIGHTS = 5
+# Weight of a memory's success rate relative to its retrieval rank when ranking snippets
+SUCCESS_WEIGHT = 0.5
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count (about four characters per token for English text)."""
+    return (len(text) + 3) // 4
+
+
+def shorten(text: str, max_tokens: int) -> str:
+    """
+    Cut ``text`` to roughly ``max_tokens``.
+    
+    Keeps whole leading sentences when at least one fits, otherwise cuts at
+    a word boundary, and marks the cut with an ellipsis.
+    """
+    text = " ".join(text.split())
+    max_chars = max_tokens * 4
+    if len(text) <= max_chars:
+        return text
+    kept = ""
+    for sentence in _SENTENCE_END.split(text):
+        candidate = f"{kept} {sentence}" if kept else sentence
+        if len(candidate) > max_chars - 4:
+            break
+        kept = candidate
+    if not kept:
+        kept = text[:max_chars - 4].rsplit(" ", 1)[0]
+    return kept + " ..."
+
+
+class ContextBuilder:
+    """
+    Builds the solve prompt from retrieved memories within a token budget.
+    
+    Each memory is rendered once into a snippet with its task and solution
+    shortened to ``snippet_max_tokens``, and kept in an LRU of
+    ``cache_size`` renderings, so repeated retrievals of the same memory
+    cost a dictionary lookup. Snippets are ranked by retrieval rank and
+    success rate and packed greedily until ``max_tokens`` is reached.
+    """
+    
+    def __init__(self, max_tokens: int = 1500, snippet_max_tokens: int = 200, cache_size: int = 2048):
+        self.max_tokens = max_tokens
+        self.snippet_max_tokens = max(16, snippet_max_tokens)
+        self.cache_size = max(1, cache_size)
+        # id(memory) -> (memory, snippet, tokens); the memory is kept so a
+        # reused id of a collected entry is never mistaken for a hit
+        self._snippets: "OrderedDict[int, Tuple[MemoryEntry, str, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    def render(self, memory: MemoryEntry) -> str:
+        """Snippet for one memory, without the numbered header."""
+        lines = [
+            f"Task: {shorten(memory.task, self.snippet_max_tokens // 4)}",
+            f"Solution: {shorten(memory.solution, self.snippet_max_tokens // 2)}",
+            f"Reasoning: {shorten(memory.reasoning, self.snippet_max_tokens // 8)}",
+        ]
+        if memory.key_insights:
+            lines.append(f"Key Insights: {', '.join(memory.key_insights[:MAX_SNIPPET_INSIGHTS])}")
+        lines.append(SEPARATOR)
+        return "\n".join(lines) + "\n"
+    
+    def snippet(self, memory: MemoryEntry) -> Tuple[str, int]:
+        """Cached (snippet, token estimate) for a memory."""
+        key = id(memory)
+        with self._lock:
+            cached = self._snippets.get(key)
+            if cached is not None and cached[0] is memory:
+                self._snippets.move_to_end(key)
+                self.hits += 1
+                return cached[1], cached[2]
+            self.misses += 1
+        text = self.render(memory)
+        tokens = estimate_tokens(text)
+        with self._lock:
+            self._snippets[key] = (memory, text, tokens)
+            self._snippets.move_to_end(key)
+            while len(self._snippets) > self.cache_size:
+                self._snippets.popitem(last=False)
+        return text, tokens
+    
+    @staticmethod
+    def _header(number: int, memory: MemoryEntry) -> str:
+        status = "✅ SUCCESS" if memory.success else "❌ FAILURE"
+        if memory.attempts > 1:
+            status += f", {memory.successes}/{memory.attempts} attempts succeeded"
+        return f"\nExperience {number} ({status}):\n"
+    
+    def select(self, retrieved: List[MemoryEntry], budget: int) -> List[Tuple[MemoryEntry, str]]:
+        """Highest-ranked snippets whose total estimate fits ``budget`` tokens, best first."""
+        count = len(retrieved)
+        ranked = sorted(
+            range(count),
+            key=lambda i: -((count - i) / count
+                            + SUCCESS_WEIGHT * retrieved[i].successes / max(1, retrieved[i].attempts))
+        )
+        selected = []
+        for i in ranked:
+            text, tokens = self.snippet(retrieved[i])
+            tokens += estimate_tokens(self._header(len(selected) + 1, retrieved[i]))
+            if tokens <= budget:
+                selected.append((retrieved[i], text))
+                budget -= tokens
+        return selected
+    
+    def build(self, task: str, retrieved: List[MemoryEntry]) -> str:
+        """Prompt context for ``task``; the task itself is always included in full."""
+        if not retrieved:
+            return f"Task: {task}\n\nNo relevant past experiences found."
+        
+        head = f"Task: {task}\n\nRelevant Past Experiences:\n{'=' * 50}\n"
+        tail = "\nBased on these experiences, apply similar strategies to solve the current task.\n"
+        budget = self.max_tokens - estimate_tokens(head) - estimate_tokens(tail)
+        selected = self.select(retrieved, budget)
+        if not selected:
+            return f"Task: {task}\n\nNo relevant past experiences found."
+        
+        parts = [head]
+        for number, (memory, text) in enumerate(selected, 1):
+            parts.append(self._header(number, memory))
+            parts.append(text)
+        parts.append(tail)
+        return "".join(parts)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters of the snippet cache."""
+        return hit_stats(len(self._snippets), self.hits, self.misses)
@@ -0,0 +1,207 @@
+"""Persistent embedding sidecar for memory stores."""
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from app.utils.cache_stats import hit_stats
+
+
+def content_hash(text: str) -> str:
+    """Stable hash of the text an embedding was computed from."""
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """Bounded LRU of embeddings keyed by content hash, with hit counters."""
+    
+    def __init__(self, max_entries: int = 4096):
+        self.max_entries = max(0, max_entries)
+        self._entries: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    def get(self, key: str) -> Optional["np.ndarray"]:
+        """Cached embedding for ``key``, or None."""
+        with self._lock:
+            vector = self._entries.get(key)
+            if vector is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return vector
+    
+    def put(self, key: str, vector: "np.ndarray"):
+        """Cache an embedding, evicting the least recently used beyond capacity."""
+        if not self.max_entries:
+            return
+        with self._lock:
+            self._entries[key] = vector
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters."""
+        return hit_stats(len(self._entries), self.hits, self.misses)
+
+
+class EmbeddingStore:
+    """
+    Versioned, append-only sidecar of embeddings keyed by content hash.
+    
+    Vectors live in ``<stem>.emb.f32`` (raw float32 rows, memory-mapped with
+    NumPy) and their content hashes in ``<stem>.emb.keys``, whose first line
+    records the format version, embedding model and dimension. A sidecar
+    written by a different model or version is ignored and rebuilt.
+    
+    Lookups run on the encode pool while the store's writer appends and
+    compacts, so all access goes through one lock, and the row map and its
+    memory map are always replaced together.
+    """
+    
+    VERSION = 1
+    
+    def __init__(self, memory_file: Path, model_name: str, dim: int):
+        memory_file = Path(memory_file)
+        self.keys_file = memory_file.with_name(memory_file.stem + ".emb.keys")
+        self.vectors_file = memory_file.with_name(memory_file.stem + ".emb.f32")
+        self.model_name = model_name
+        self.dim = dim
+        self.rows: Dict[str, int] = {}
+        self._vectors = None
+        self._valid = False
+        self._lock = threading.RLock()
+    
+    def load(self):
+        """Memory-map the sidecar if it matches the current model and version."""
+        with self._lock:
+            self.rows, self._vectors, self._valid = {}, None, False
+            self._load()
+    
+    def _load(self):
+        if not self.keys_file.exists() or not self.vectors_file.exists():
+            return
+        try:
+            with open(self.keys_file, 'r') as f:
+                if json.loads(f.readline()) != self._header():
+                    return
+                lines = f.readlines()
+        except (OSError, ValueError):
+            return
+        
+        keys = []
+        for line in lines:
+            if not line.endswith("\n") or len(line) != 41:
+                break
+            keys.append(line[:40])
+        
+        # A crash can leave a torn row or key at the tail; trim both files
+        # back to the last complete pair so later appends stay aligned.
+        row_bytes = 4 * self.dim
+        vectors_size = self.vectors_file.stat().st_size
+        n = min(len(keys), vectors_size // row_bytes)
+        if n != len(lines) or vectors_size != n * row_bytes:
+            with open(self.vectors_file, 'r+b') as f:
+                f.truncate(n * row_bytes)
+            with open(self.keys_file, 'w') as f:
+                f.write(json.dumps(self._header()) + "\n")
+                f.write("".join(key + "\n" for key in keys[:n]))
+        
+        rows = {key: i for i, key in enumerate(keys[:n])}
+        self.rows, self._vectors = rows, self._map(n)
+        self._valid = True
+    
+    def get(self, hashes: List[str]) -> Tuple["np.ndarray", List[int]]:
+        """Return a matrix for ``hashes`` and the positions that still need encoding."""
+        matrix = np.zeros((len(hashes), self.dim), dtype='float32')
+        missing = []
+        with self._lock:
+            for pos, key in enumerate(hashes):
+                row = self.rows.get(key)
+                if row is None:
+                    missing.append(pos)
+                else:
+                    matrix[pos] = self._vectors[row]
+        return matrix, missing
+    
+    def vectors(self) -> "np.ndarray":
+        """Copy of every stored embedding, in sidecar row order."""
+        with self._lock:
+            if self._vectors is None:
+                return np.zeros((0, self.dim), dtype='float32')
+            return np.array(self._vectors[:len(self.rows)], dtype='float32')
+    
+    def append(self, hashes: List[str], vectors: "np.ndarray"):
+        """Append embeddings for hashes not already in the sidecar."""
+        with self._lock:
+            if not self._valid:
+                self._reset()
+            new = {}
+            for key, vector in zip(hashes, vectors):
+                if key not in self.rows and key not in new:
+                    new[key] = vector
+            if not new:
+                return
+            
+            block = np.asarray(list(new.values()), dtype='float32').reshape(len(new), self.dim)
+            with open(self.vectors_file, 'ab') as f:
+                f.write(block.tobytes())
+            with open(self.keys_file, 'a') as f:
+                f.write("".join(key + "\n" for key in new))
+            
+            # Map the grown file before publishing rows that point into it
+            start = len(self.rows)
+            self._vectors = self._map(start + len(new))
+            for offset, key in enumerate(new):
+                self.rows[key] = start + offset
+    
+    def compact(self, hashes: List[str]):
+        """Rewrite the sidecar so it only holds rows for ``hashes``."""
+        with self._lock:
+            unique = list(dict.fromkeys(k for k in hashes if k in self.rows))
+            matrix, _ = self.get(unique)
+            tmp_vectors = self.vectors_file.with_name(self.vectors_file.name + ".tmp")
+            tmp_keys = self.keys_file.with_name(self.keys_file.name + ".tmp")
+            with open(tmp_vectors, 'wb') as f:
+                f.write(matrix.tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+            with open(tmp_keys, 'w') as f:
+                f.write(json.dumps(self._header()) + "\n")
+                f.write("".join(key + "\n" for key in unique))
+                f.flush()
+                os.fsync(f.fileno())
+            # Drop the keys first so a crash mid-swap invalidates the sidecar
+            # instead of pairing old keys with new vectors.
+            self.keys_file.unlink(missing_ok=True)
+            os.replace(tmp_vectors, self.vectors_file)
+            os.replace(tmp_keys, self.keys_file)
+            self.load()
+    
+    def _reset(self):
+        with open(self.vectors_file, 'wb'):
+            pass
+        with open(self.keys_file, 'w') as f:
+            f.write(json.dumps(self._header()) + "\n")
+        self.rows = {}
+        self._vectors = None
+        self._valid = True
+    
+    def _map(self, n: int) -> Optional["np.ndarray"]:
+        if n == 0:
+            return None
+        return np.memmap(self.vectors_file, dtype='float32', mode='r', shape=(n, self.dim))
+    
+    def _header(self) -> Dict:
+        return {"version": self.VERSION, "model": self.model_name, "dim": self.dim}
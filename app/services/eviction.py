@@ -0,0 +1,89 @@
+"""Eviction policies for capacity-bounded memory stores."""
+import math
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Union
+
+from app.models.memory import MemoryEntry
+
+
+@dataclass
+class MemoryUsage:
+    """Retrieval bookkeeping for one memory (kept in memory, not persisted)."""
+    last_used: float
+    hits: int = 0
+    
+    @classmethod
+    def for_memory(cls, memory: MemoryEntry) -> 'MemoryUsage':
+        """Usage of a memory that has not been retrieved yet."""
+        return cls(last_used=created_at(memory))
+
+
+def created_at(memory: MemoryEntry) -> float:
+    """Creation time of a memory as a Unix timestamp (0 if unparseable)."""
+    try:
+        return datetime.fromisoformat(memory.timestamp).timestamp()
+    except (TypeError, ValueError):
+        return 0.0
+
+
+# A policy returns one sort key per memory; the lowest keys are evicted first.
+EvictionPolicy = Callable[[List[MemoryEntry], List[MemoryUsage]], List[Any]]
+
+
+def lru_policy(memories: List[MemoryEntry], usage: List[MemoryUsage]) -> List[Any]:
+    """Evict the least recently retrieved memories first."""
+    return [u.last_used for u in usage]
+
+
+def oldest_policy(memories: List[MemoryEntry], usage: List[MemoryUsage]) -> List[Any]:
+    """Evict the oldest memories first."""
+    return [created_at(m) for m in memories]
+
+
+def failure_first_policy(memories: List[MemoryEntry], usage: List[MemoryUsage]) -> List[Any]:
+    """Evict failed memories first, oldest first within each group."""
+    return [(bool(m.success), created_at(m)) for m in memories]
+
+
+def utility_policy(memories: List[MemoryEntry], usage: List[MemoryUsage]) -> List[Any]:
+    """
+    Evict the memories with the lowest utility first.
+    
+    Utility rewards successful outcomes and frequent retrieval, and decays
+    with the time since the memory was last used (one-day half-life).
+    """
+    now = time.time()
+    scores = []
+    for memory, u in zip(memories, usage):
+        outcome = 1.0 if memory.success else 0.5
+        recency = 0.5 ** (max(0.0, now - u.last_used) / 86400)
+        scores.append((outcome * (1 + math.log1p(u.hits)) * (0.5 + recency), u.last_used))
+    return scores
+
+
+EVICTION_POLICIES: Dict[str, EvictionPolicy] = {
+    "lru": lru_policy,
+    "oldest": oldest_policy,
+    "failure_first": failure_first_policy,
+    "utility": utility_policy,
+}
+
+
+def get_eviction_policy(policy: Union[str, EvictionPolicy]) -> EvictionPolicy:
+    """Resolve a policy name (or pass through a custom callable)."""
+    if callable(policy):
+        return policy
+    if policy not in EVICTION_POLICIES:
+        raise ValueError(f"Unknown eviction policy: {policy} (expected one of {list(EVICTION_POLICIES)})")
+    return EVICTION_POLICIES[policy]
+
+
+def select_victims(memories: List[MemoryEntry], usage: List[MemoryUsage],
+                   count: int, policy: EvictionPolicy) -> List[int]:
+    """Positions of the ``count`` memories the policy would evict first."""
+    if count <= 0:
+        return []
+    keys = policy(memories, usage)
+    return sorted(range(len(memories)), key=lambda pos: keys[pos])[:count]
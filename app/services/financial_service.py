@@ -1,8 +1,7 @@
 """Financial services specialized agent."""
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Callable, Tuple, AsyncIterator
 from app.services.agent_service import AgentService
-from app.services.llm_service import LLMService
-from app.services.memory_service import MemoryService
+from app.services.registry import get_llm_service, get_memory_service
 from app.core.config import FINANCIAL_MEMORY_FILE
 
 
@@ -10,28 +9,110 @@ class FinancialService(AgentService):
     """Specialized service for financial use cases."""
     
     def __init__(self):
-        llm = LLMService()
-        memory = MemoryService(memory_file=FINANCIAL_MEMORY_FILE)
+        llm = get_llm_service()
+        memory = get_memory_service(FINANCIAL_MEMORY_FILE)
         super().__init__(llm, memory)
     
     def assess_risk(self, transaction: Dict, customer_profile: Dict) -> Dict[str, Any]:
         """Assess transaction risk."""
-        task = f"Assess risk for {transaction.get('type')} transaction of ${transaction.get('amount'):,.2f} from {customer_profile.get('tier')} customer (account age: {customer_profile.get('account_age_days')} days)"
-        return self.solve_task(task, task_type="risk_assessment", use_llm=True)
+        return self.solve_task(self._risk_task(transaction, customer_profile), task_type="risk_assessment", use_llm=True)
     
     def check_compliance(self, transaction: Dict, regulation: str) -> Dict[str, Any]:
         """Check regulatory compliance."""
-        task = f"Check {regulation} compliance for {transaction.get('type')} transaction of ${transaction.get('amount'):,.2f} in {transaction.get('region')}"
-        return self.solve_task(task, task_type="compliance", use_llm=True)
+        return self.solve_task(self._compliance_task(transaction, regulation), task_type="compliance", use_llm=True)
     
     def detect_fraud(self, transaction: Dict, customer_history: List[Dict]) -> Dict[str, Any]:
         """Detect fraud patterns."""
-        avg_amount = sum(t.get("amount", 0) for t in customer_history) / len(customer_history) if customer_history else 0
-        task = f"Detect fraud in {transaction.get('type')} transaction of ${transaction.get('amount'):,.2f}. Customer has {len(customer_history)} past transactions with average ${avg_amount:,.2f}"
-        return self.solve_task(task, task_type="fraud_detection", use_llm=True)
+        return self.solve_task(self._fraud_task(transaction, customer_history), task_type="fraud_detection", use_llm=True)
     
     def optimize_portfolio(self, market_conditions: Dict, portfolio: Dict) -> Dict[str, Any]:
         """Optimize portfolio strategy."""
-        task = f"Optimize portfolio for {market_conditions.get('trend')} market with {market_conditions.get('volatility')} volatility. Portfolio value: ${portfolio.get('value'):,.2f}"
-        return self.solve_task(task, task_type="portfolio_optimization", use_llm=True)
-
+        return self.solve_task(self._portfolio_task(market_conditions, portfolio), task_type="portfolio_optimization", use_llm=True)
+    
+    async def aassess_risk(self, transaction: Dict, customer_profile: Dict) -> Dict[str, Any]:
+        """Assess transaction risk (async)."""
+        return await self.asolve_task(self._risk_task(transaction, customer_profile), task_type="risk_assessment", use_llm=True)
+    
+    async def acheck_compliance(self, transaction: Dict, regulation: str) -> Dict[str, Any]:
+        """Check regulatory compliance (async)."""
+        return await self.asolve_task(self._compliance_task(transaction, regulation), task_type="compliance", use_llm=True)
+    
+    async def adetect_fraud(self, transaction: Dict, customer_history: List[Dict]) -> Dict[str, Any]:
+        """Detect fraud patterns (async)."""
+        return await self.asolve_task(self._fraud_task(transaction, customer_history), task_type="fraud_detection", use_llm=True)
+    
+    async def aoptimize_portfolio(self, market_conditions: Dict, portfolio: Dict) -> Dict[str, Any]:
+        """Optimize portfolio strategy (async)."""
+        return await self.asolve_task(self._portfolio_task(market_conditions, portfolio), task_type="portfolio_optimization", use_llm=True)
+    
+    def astream_risk(self, transaction: Dict, customer_profile: Dict) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """Assess transaction risk, streaming the solution."""
+        return self.astream_task(self._risk_task(transaction, customer_profile), task_type="risk_assessment", use_llm=True)
+    
+    def astream_compliance(self, transaction: Dict, regulation: str) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """Check regulatory compliance, streaming the solution."""
+        return self.astream_task(self._compliance_task(transaction, regulation), task_type="compliance", use_llm=True)
+    
+    def astream_fraud(self, transaction: Dict, customer_history: List[Dict]) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """Detect fraud patterns, streaming the solution."""
+        return self.astream_task(self._fraud_task(transaction, customer_history), task_type="fraud_detection", use_llm=True)
+    
+    def astream_portfolio(self, market_conditions: Dict, portfolio: Dict) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """Optimize portfolio strategy, streaming the solution."""
+        return self.astream_task(self._portfolio_task(market_conditions, portfolio), task_type="portfolio_optimization", use_llm=True)
+    
+    async def aassess_risk_batch(self, items: List[Tuple[Dict, Dict]], max_concurrency: int = None) -> List[Dict[str, Any]]:
+        """Assess risk for many (transaction, customer_profile) pairs."""
+        return await self._abatch(self._risk_task, "risk_assessment", items, max_concurrency)
+    
+    async def acheck_compliance_batch(self, items: List[Tuple[Dict, str]], max_concurrency: int = None) -> List[Dict[str, Any]]:
+        """Check compliance for many (transaction, regulation) pairs."""
+        return await self._abatch(self._compliance_task, "compliance", items, max_concurrency)
+    
+    async def adetect_fraud_batch(self, items: List[Tuple[Dict, List[Dict]]], max_concurrency: int = None) -> List[Dict[str, Any]]:
+        """Detect fraud for many (transaction, customer_history) pairs."""
+        return await self._abatch(self._fraud_task, "fraud_detection", items, max_concurrency)
+    
+    async def aoptimize_portfolio_batch(self, items: List[Tuple[Dict, Dict]], max_concurrency: int = None) -> List[Dict[str, Any]]:
+        """Optimize many (market_conditions, portfolio) pairs."""
+        return await self._abatch(self._portfolio_task, "portfolio_optimization", items, max_concurrency)
+    
+    async def _abatch(self, build_task: Callable[..., str], task_type: str, items: List[Tuple],
+                      max_concurrency: int = None) -> List[Dict[str, Any]]:
+        """Build a task per item and solve them as one batch, keeping input order."""
+        tasks, errors = [], {}
+        for i, args in enumerate(items):
+            try:
+                tasks.append({"task": build_task(*args), "task_type": task_type, "use_llm": True})
+            except Exception as e:
+                errors[i] = str(e)
+        
+        solved = iter(await self.asolve_batch(tasks, max_concurrency))
+        results = []
+        for i in range(len(items)):
+            if i in errors:
+                results.append({"index": i, "result": None, "error": errors[i]})
+            else:
+                results.append({**next(solved), "index": i})
+        return results
+    
+    @staticmethod
+    def _risk_task(transaction: Dict, customer_profile: Dict) -> str:
+        """Task description for a risk assessment."""
+        return f"Assess risk for {transaction.get('type')} transaction of ${transaction.get('amount'):,.2f} from {customer_profile.get('tier')} customer (account age: {customer_profile.get('account_age_days')} days)"
+    
+    @staticmethod
+    def _compliance_task(transaction: Dict, regulation: str) -> str:
+        """Task description for a compliance check."""
+        return f"Check {regulation} compliance for {transaction.get('type')} transaction of ${transaction.get('amount'):,.2f} in {transaction.get('region')}"
+    
+    @staticmethod
+    def _fraud_task(transaction: Dict, customer_history: List[Dict]) -> str:
+        """Task description for fraud detection."""
+        avg_amount = sum(t.get("amount", 0) for t in customer_history) / len(customer_history) if customer_history else 0
+        return f"Detect fraud in {transaction.get('type')} transaction of ${transaction.get('amount'):,.2f}. Customer has {len(customer_history)} past transactions with average ${avg_amount:,.2f}"
+    
+    @staticmethod
+    def _portfolio_task(market_conditions: Dict, portfolio: Dict) -> str:
+        """Task description for portfolio optimization."""
+        return f"Optimize portfolio for {market_conditions.get('trend')} market with {market_conditions.get('volatility')} volatility. Portfolio value: ${portfolio.get('value'):,.2f}"
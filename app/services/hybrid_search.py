@@ -0,0 +1,75 @@
+"""Fusion of lexical and vector rankings, with optional cross-encoder reranking."""
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Optional reranker dependency
+try:
+    from sentence_transformers import CrossEncoder
+    HAS_CROSS_ENCODER = True
+except ImportError:
+    HAS_CROSS_ENCODER = False
+    CrossEncoder = None
+
+FUSION_METHODS = ("rrf", "weighted")
+
+# (position, score) pairs, best first; higher scores are better
+Hits = List[Tuple[int, float]]
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Hits], k: int = 60,
+                           weights: Optional[Sequence[float]] = None) -> Hits:
+    """
+    Fuse rankings by ``sum(weight / (k + rank))`` over the lists each position appears in.
+    
+    Only ranks are used, so scores on different scales (BM25, distances)
+    need no calibration.
+    """
+    weights = weights or [1.0] * len(rankings)
+    fused: Dict[int, float] = {}
+    for hits, weight in zip(rankings, weights):
+        for rank, (position, _) in enumerate(hits, 1):
+            fused[position] = fused.get(position, 0.0) + weight / (k + rank)
+    return sorted(fused.items(), key=lambda item: (-item[1], -item[0]))
+
+
+def weighted_score_fusion(rankings: Sequence[Hits], weights: Optional[Sequence[float]] = None) -> Hits:
+    """Fuse by a weighted sum of each list's min-max normalized scores (0 when absent from a list)."""
+    weights = weights or [1.0] * len(rankings)
+    fused: Dict[int, float] = {}
+    for hits, weight in zip(rankings, weights):
+        if not hits:
+            continue
+        scores = [score for _, score in hits]
+        low, span = min(scores), (max(scores) - min(scores)) or 1.0
+        for position, score in hits:
+            fused[position] = fused.get(position, 0.0) + weight * (score - low) / span
+    return sorted(fused.items(), key=lambda item: (-item[1], -item[0]))
+
+
+def fuse(vector_hits: Hits, text_hits: Hits, method: str = "rrf", vector_weight: float = 0.5,
+         rrf_k: int = 60) -> Hits:
+    """Fuse vector and BM25 hits with ``method`` ("rrf" or "weighted")."""
+    weights = [vector_weight, 1.0 - vector_weight]
+    if method == "weighted":
+        return weighted_score_fusion([vector_hits, text_hits], weights)
+    if method != "rrf":
+        raise ValueError(f"Unknown fusion method: {method} (choose from {', '.join(FUSION_METHODS)})")
+    # RRF weights are relative; scale so equal weights give the textbook formula
+    return reciprocal_rank_fusion([vector_hits, text_hits], rrf_k, [2 * w for w in weights])
+
+
+class Reranker:
+    """Local cross-encoder that scores (query, memory text) pairs jointly."""
+    
+    def __init__(self, model_name: str, max_length: int = 512):
+        if not HAS_CROSS_ENCODER:
+            raise ValueError("sentence-transformers not installed")
+        self.model_name = model_name
+        self.model = CrossEncoder(model_name, max_length=max_length)
+    
+    def score(self, query: str, texts: List[str]) -> "np.ndarray":
+        """Relevance of each text to ``query`` (higher is better)."""
+        if not texts:
+            return np.zeros(0, dtype='float32')
+        return np.asarray(self.model.predict([(query, text) for text in texts]), dtype='float32').reshape(-1)
@@ -0,0 +1,141 @@
+"""Response cache for LLM calls."""
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Any, Optional, Tuple
+
+from app.utils.cache_stats import hit_stats
+from app.utils.executors import cache_executor, run_in_cache_pool
+
+
+def normalize_prompt(text: Optional[str]) -> str:
+    """Collapse whitespace so formatting-only differences share a cache entry."""
+    return " ".join((text or "").split())
+
+
+def cache_key(provider: str, model: str, system_prompt: Optional[str], prompt: str,
+              max_tokens: int) -> str:
+    """Cache key for one generate() call."""
+    payload = json.dumps([
+        provider, model, normalize_prompt(system_prompt), normalize_prompt(prompt), max_tokens
+    ])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    """
+    In-memory LRU cache with TTL, backed by an optional SQLite tier.
+    
+    Lookups check memory first, then SQLite (promoting hits back into
+    memory). Both tiers expire entries after ``ttl_seconds``. SQLite I/O
+    runs on the cache executor: ``aget`` awaits it off the event loop and
+    ``set`` writes behind, so callers only ever wait on the in-memory tier.
+    Expired rows are purged on open and every ``purge_every`` inserts.
+    """
+    
+    purge_every = 256
+    
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 3600,
+                 sqlite_path: Optional[Path] = None):
+        self.max_entries = max(1, max_entries)
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._db = None
+        self._db_lock = threading.Lock()
+        self._inserts = 0
+        if sqlite_path:
+            self._db = sqlite3.connect(str(sqlite_path), check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache "
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS llm_cache_expires_at ON llm_cache (expires_at)")
+            self._purge()
+            self._db.commit()
+    
+    def get(self, key: str) -> Optional[str]:
+        """Cached response for ``key``, or None (reads SQLite on the calling thread)."""
+        value = self._get_memory(key)
+        if value is None and self._db is not None:
+            value = self._get_disk(key)
+        return self._count(value)
+    
+    async def aget(self, key: str) -> Optional[str]:
+        """Cached response for ``key``, or None, without blocking the event loop on SQLite."""
+        value = self._get_memory(key)
+        if value is None and self._db is not None:
+            value = await run_in_cache_pool(self._get_disk, key)
+        return self._count(value)
+    
+    def set(self, key: str, value: str):
+        """Store a response under ``key`` (the SQLite write happens in the background)."""
+        expires_at = time.time() + self.ttl_seconds
+        with self._lock:
+            self._remember(key, value, expires_at)
+        if self._db is not None:
+            cache_executor.submit(self._write, key, value, expires_at)
+    
+    def _get_memory(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at > time.time():
+                self._entries.move_to_end(key)
+                return value
+            del self._entries[key]
+            return None
+    
+    def _get_disk(self, key: str) -> Optional[str]:
+        with self._db_lock:
+            row = self._db.execute(
+                "SELECT value, expires_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None or row[1] <= time.time():
+            return None
+        with self._lock:
+            self._remember(key, row[0], row[1])
+            self.disk_hits += 1
+        return row[0]
+    
+    def _count(self, value: Optional[str]) -> Optional[str]:
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+    
+    def _write(self, key: str, value: str, expires_at: float):
+        with self._db_lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, expires_at)
+            )
+            self._inserts += 1
+            if self._inserts % self.purge_every == 0:
+                self._purge()
+            self._db.commit()
+    
+    def _purge(self):
+        """Drop expired rows (the caller holds ``_db_lock`` or is the constructor, and commits)."""
+        self._db.execute("DELETE FROM llm_cache WHERE expires_at <= ?", (time.time(),))
+    
+    def _remember(self, key: str, value: str, expires_at: float):
+        self._entries[key] = (value, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters."""
+        return hit_stats(len(self._entries), self.hits, self.misses, disk_hits=self.disk_hits)
@@ -0,0 +1,370 @@
+"""Pooled LLM provider clients with deadlines, retries, circuit breaking and hedging."""
+import asyncio
+import random
+import threading
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional, Tuple
+
+# Optional imports
+try:
+    import httpx
+    HAS_HTTPX = True
+except ImportError:
+    HAS_HTTPX = False
+    httpx = None
+
+try:
+    import openai
+    HAS_OPENAI = True
+except ImportError:
+    HAS_OPENAI = False
+    openai = None
+
+try:
+    import anthropic
+    HAS_ANTHROPIC = True
+except ImportError:
+    HAS_ANTHROPIC = False
+    anthropic = None
+
+from app.core.config import (
+    OPENAI_API_KEY, ANTHROPIC_API_KEY, LLM_CIRCUIT_FAILURE_THRESHOLD, LLM_CIRCUIT_RESET_SECONDS,
+    LLM_TIMEOUT_SECONDS, LLM_DEADLINE_SECONDS, LLM_MAX_RETRIES, LLM_RETRY_BACKOFF_SECONDS,
+    LLM_HEDGE_AFTER_SECONDS, LLM_MAX_CONNECTIONS
+)
+
+RETRYABLE_STATUS = {408, 409, 429}
+
+
+class LLMUnavailableError(Exception):
+    """No response could be obtained from a provider within its retries and deadline."""
+
+
+def is_retryable(error: Exception) -> bool:
+    """Whether a failed call is worth retrying (timeouts, connection errors, 429, 5xx)."""
+    if isinstance(error, (asyncio.TimeoutError, TimeoutError, ConnectionError)):
+        return True
+    if HAS_HTTPX and isinstance(error, httpx.TransportError):
+        return True
+    if HAS_OPENAI and isinstance(error, openai.APIConnectionError):
+        return True
+    if HAS_ANTHROPIC and isinstance(error, anthropic.APIConnectionError):
+        return True
+    status = getattr(error, "status_code", None)
+    return status is not None and (status in RETRYABLE_STATUS or status >= 500)
+
+
+def backoff_delay(attempt: int, base: float) -> float:
+    """Full-jitter exponential backoff before retry ``attempt`` (1-based)."""
+    return random.uniform(0, base * (2 ** (attempt - 1)))
+
+
+_clients: Dict[Tuple[str, str], Tuple[Any, Any]] = {}
+_clients_lock = threading.Lock()
+
+
+def _make_clients(provider: str, base_url: str) -> Tuple[Any, Any]:
+    """(sync, async) SDK clients sharing LLM_MAX_CONNECTIONS keep-alive connections each."""
+    http = {}
+    if HAS_HTTPX:
+        limits = httpx.Limits(max_connections=LLM_MAX_CONNECTIONS,
+                              max_keepalive_connections=LLM_MAX_CONNECTIONS)
+        http = {"sync": httpx.Client(limits=limits), "async": httpx.AsyncClient(limits=limits)}
+    
+    if provider == "openai":
+        if not HAS_OPENAI:
+            raise ValueError("openai package not installed")
+        # Local OpenAI-compatible servers usually need no key
+        api_key = OPENAI_API_KEY or ("unused" if base_url else "")
+        if not api_key:
+            raise ValueError("OPENAI_API_KEY not set")
+        options = {"api_key": api_key, "base_url": base_url or None, "max_retries": 0}
+        return (openai.OpenAI(**options, http_client=http.get("sync")),
+                openai.AsyncOpenAI(**options, http_client=http.get("async")))
+    if provider == "anthropic":
+        if not HAS_ANTHROPIC:
+            raise ValueError("anthropic package not installed")
+        if not ANTHROPIC_API_KEY:
+            raise ValueError("ANTHROPIC_API_KEY not set")
+        options = {"api_key": ANTHROPIC_API_KEY, "base_url": base_url or None, "max_retries": 0}
+        return (anthropic.Anthropic(**options, http_client=http.get("sync")),
+                anthropic.AsyncAnthropic(**options, http_client=http.get("async")))
+    raise ValueError(f"Unknown LLM provider: {provider}")
+
+
+def pooled_clients(provider: str, base_url: str = None) -> Tuple[Any, Any]:
+    """Process-wide (sync, async) clients for a provider and endpoint, so connections are reused."""
+    key = (provider, base_url or "")
+    with _clients_lock:
+        if key not in _clients:
+            _clients[key] = _make_clients(provider, base_url or "")
+        return _clients[key]
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+    
+    After ``failure_threshold`` failed calls in a row the circuit opens and
+    calls are refused for ``reset_seconds``; then it is half open and lets a
+    single trial call through, whose outcome closes or reopens it.
+    """
+    
+    def __init__(self, failure_threshold: int = 5, reset_seconds: float = 30):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_seconds = reset_seconds
+        self.consecutive_failures = 0
+        self.last_error: Optional[str] = None
+        self._opened_at = 0.0
+        self._trial_at: Optional[float] = None
+        self._lock = threading.Lock()
+    
+    @property
+    def state(self) -> str:
+        """Current state: "closed" (healthy), "open" (refusing calls) or "half_open" (probing)."""
+        if self.consecutive_failures < self.failure_threshold:
+            return "closed"
+        if time.monotonic() - self._opened_at < self.reset_seconds:
+            return "open"
+        return "half_open"
+    
+    def allow(self) -> bool:
+        """Whether a call may be made now (claims the trial call when half open)."""
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            # A trial whose outcome never arrived (e.g. an abandoned stream)
+            # is given up after another reset period
+            now = time.monotonic()
+            if state == "half_open" and (self._trial_at is None or now - self._trial_at >= self.reset_seconds):
+                self._trial_at = now
+                return True
+            return False
+    
+    def record_success(self):
+        with self._lock:
+            self.consecutive_failures = 0
+            self._trial_at = None
+    
+    def record_failure(self, error: Exception):
+        with self._lock:
+            self.consecutive_failures += 1
+            self.last_error = str(error)
+            if self.consecutive_failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+            self._trial_at = None
+
+
+class LLMBackend:
+    """
+    One provider and model behind pooled clients.
+    
+    Each call is bounded by a per-attempt timeout and an overall deadline,
+    retried with jittered backoff on transient errors, and optionally
+    hedged (async only). Outcomes feed the backend's circuit breaker; when
+    the circuit is open or every attempt fails, LLMUnavailableError is raised.
+    """
+    
+    def __init__(self, provider: str, model: str, base_url: str = None,
+                 timeout: float = None, deadline: float = None, max_retries: int = None,
+                 backoff: float = None, hedge_after: float = None,
+                 breaker: CircuitBreaker = None, name: str = None):
+        self.provider = provider
+        self.model = model
+        self.base_url = base_url or ""
+        self.alias = name
+        self.client, self.async_client = pooled_clients(provider, self.base_url)
+        self.timeout = timeout or LLM_TIMEOUT_SECONDS
+        self.deadline = deadline or LLM_DEADLINE_SECONDS
+        self.max_retries = LLM_MAX_RETRIES if max_retries is None else max_retries
+        self.backoff = LLM_RETRY_BACKOFF_SECONDS if backoff is None else backoff
+        self.hedge_after = LLM_HEDGE_AFTER_SECONDS if hedge_after is None else hedge_after
+        self.breaker = breaker or CircuitBreaker(LLM_CIRCUIT_FAILURE_THRESHOLD, LLM_CIRCUIT_RESET_SECONDS)
+        self.calls = 0
+        self.retries = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+    
+    @property
+    def name(self) -> str:
+        return self.alias or f"{self.provider}:{self.model}"
+    
+    @staticmethod
+    def _openai_messages(prompt: str, system_prompt: str = None):
+        messages = []
+        if system_prompt:
+            messages.append({"role": "system", "content": system_prompt})
+        messages.append({"role": "user", "content": prompt})
+        return messages
+    
+    def _request(self, prompt: str, system_prompt: str, max_tokens: int, timeout: float) -> Dict[str, Any]:
+        """Keyword arguments of a provider request."""
+        if self.provider == "openai":
+            return {"model": self.model, "messages": self._openai_messages(prompt, system_prompt),
+                    "max_tokens": max_tokens, "temperature": 0.7, "timeout": timeout}
+        return {"model": self.model, "max_tokens": max_tokens, "system": system_prompt or "",
+                "messages": [{"role": "user", "content": prompt}], "timeout": timeout}
+    
+    @staticmethod
+    def _text(provider: str, response) -> str:
+        if provider == "openai":
+            return response.choices[0].message.content or ""
+        return response.content[0].text
+    
+    def _complete(self, prompt: str, system_prompt: str, max_tokens: int, timeout: float) -> str:
+        """One synchronous attempt."""
+        request = self._request(prompt, system_prompt, max_tokens, timeout)
+        if self.provider == "openai":
+            return self._text(self.provider, self.client.chat.completions.create(**request))
+        return self._text(self.provider, self.client.messages.create(**request))
+    
+    async def _acomplete(self, prompt: str, system_prompt: str, max_tokens: int, timeout: float) -> str:
+        """One asynchronous attempt, cancelled at ``timeout``."""
+        request = self._request(prompt, system_prompt, max_tokens, timeout)
+        if self.provider == "openai":
+            call = self.async_client.chat.completions.create(**request)
+        else:
+            call = self.async_client.messages.create(**request)
+        return self._text(self.provider, await asyncio.wait_for(call, timeout))
+    
+    def _admit(self):
+        if not self.breaker.allow():
+            raise LLMUnavailableError(f"{self.name}: circuit open ({self.breaker.last_error})")
+        self.calls += 1
+    
+    def _fail(self, error: Exception) -> LLMUnavailableError:
+        self.breaker.record_failure(error)
+        return LLMUnavailableError(f"{self.name}: {error}")
+    
+    def generate(self, prompt: str, system_prompt: str = None, max_tokens: int = 500) -> str:
+        """Generate a response with retries within the deadline."""
+        self._admit()
+        deadline = time.monotonic() + self.deadline
+        attempt = 0
+        while True:
+            try:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError(f"deadline of {self.deadline:g}s exceeded")
+                text = self._complete(prompt, system_prompt, max_tokens, min(self.timeout, remaining))
+                self.breaker.record_success()
+                return text
+            except Exception as e:
+                attempt += 1
+                delay = backoff_delay(attempt, self.backoff)
+                if (attempt > self.max_retries or not is_retryable(e)
+                        or time.monotonic() + delay >= deadline):
+                    raise self._fail(e)
+                self.retries += 1
+                time.sleep(delay)
+    
+    async def _ahedged(self, attempt: Callable[[], Awaitable[str]]) -> str:
+        """Run ``attempt``; if it is slower than ``hedge_after``, race it against a second one."""
+        first = asyncio.ensure_future(attempt())
+        if self.hedge_after <= 0:
+            return await first
+        done, _ = await asyncio.wait({first}, timeout=self.hedge_after)
+        if done:
+            return first.result()
+        
+        self.hedges += 1
+        second = asyncio.ensure_future(attempt())
+        pending = {first, second}
+        error = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        self.hedge_wins += task is second
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+    
+    async def agenerate(self, prompt: str, system_prompt: str = None, max_tokens: int = 500) -> str:
+        """Generate a response with retries (and hedging) within the deadline."""
+        self._admit()
+        deadline = time.monotonic() + self.deadline
+        attempt = 0
+        while True:
+            try:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError(f"deadline of {self.deadline:g}s exceeded")
+                timeout = min(self.timeout, remaining)
+                text = await self._ahedged(lambda: self._acomplete(prompt, system_prompt, max_tokens, timeout))
+                self.breaker.record_success()
+                return text
+            except Exception as e:
+                attempt += 1
+                delay = backoff_delay(attempt, self.backoff)
+                if (attempt > self.max_retries or not is_retryable(e)
+                        or time.monotonic() + delay >= deadline):
+                    raise self._fail(e)
+                self.retries += 1
+                await asyncio.sleep(delay)
+    
+    async def _astream_once(self, prompt: str, system_prompt: str, max_tokens: int,
+                            timeout: float) -> AsyncIterator[str]:
+        request = self._request(prompt, system_prompt, max_tokens, timeout)
+        if self.provider == "openai":
+            stream = await asyncio.wait_for(
+                self.async_client.chat.completions.create(**request, stream=True), timeout
+            )
+            async for chunk in stream:
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if delta:
+                    yield delta
+        else:
+            async with self.async_client.messages.stream(**request) as stream:
+                async for delta in stream.text_stream:
+                    yield delta
+    
+    async def astream(self, prompt: str, system_prompt: str = None, max_tokens: int = 500) -> AsyncIterator[str]:
+        """
+        Stream a response, retrying only until the first text arrives.
+        
+        Once text has been yielded a failure cannot be retried transparently
+        and is raised as LLMUnavailableError.
+        """
+        self._admit()
+        deadline = time.monotonic() + self.deadline
+        attempt = 0
+        started = False
+        while True:
+            try:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError(f"deadline of {self.deadline:g}s exceeded")
+                async for delta in self._astream_once(prompt, system_prompt, max_tokens,
+                                                      min(self.timeout, remaining)):
+                    started = True
+                    yield delta
+                self.breaker.record_success()
+                return
+            except Exception as e:
+                attempt += 1
+                delay = backoff_delay(attempt, self.backoff)
+                if (started or attempt > self.max_retries or not is_retryable(e)
+                        or time.monotonic() + delay >= deadline):
+                    raise self._fail(e)
+                self.retries += 1
+                await asyncio.sleep(delay)
+    
+    def status(self) -> Dict[str, Any]:
+        """Circuit state and call counters (no network calls)."""
+        return {
+            "name": self.name,
+            "base_url": self.base_url or None,
+            "circuit_state": self.breaker.state,
+            "consecutive_failures": self.breaker.consecutive_failures,
+            "last_error": self.breaker.last_error,
+            "calls": self.calls,
+            "retries": self.retries,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+        }
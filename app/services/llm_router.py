@@ -0,0 +1,169 @@
+"""Latency-aware routing of LLM calls across several provider backends."""
+import random
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from app.services.llm_client import LLMBackend
+
+# Backends with fewer samples are tried first so every backend gets measured
+MIN_SAMPLES = 5
+# Local OpenAI-compatible servers are named "local" in backend specs
+LOCAL_PROVIDER = "local"
+
+
+def parse_backend_spec(spec: str) -> Tuple[Optional[str], str, str, str]:
+    """
+    Parse ``[name=]provider:model[@base_url]`` into (name, provider, model, base_url).
+    
+    ``local`` is an OpenAI-compatible endpoint and requires ``@base_url``.
+    """
+    name = None
+    target, _, base_url = spec.strip().partition("@")
+    if "=" in target:
+        name, _, target = target.partition("=")
+    provider, _, model = target.partition(":")
+    if not provider or not model:
+        raise ValueError(f"Invalid LLM backend spec: {spec!r} (expected provider:model[@base_url])")
+    if provider == LOCAL_PROVIDER:
+        if not base_url:
+            raise ValueError(f"Local LLM backend needs a base URL: {spec!r}")
+        name = name or f"{LOCAL_PROVIDER}:{model}"
+        provider = "openai"
+    return name or None, provider, model, base_url
+
+
+def parse_routes(spec: str) -> Dict[str, List[str]]:
+    """Parse ``task_type=name|name;task_type=name`` into task_type -> backend names."""
+    routes = {}
+    for rule in filter(None, (part.strip() for part in spec.split(";"))):
+        task_type, _, names = rule.partition("=")
+        backends = [name.strip() for name in names.split("|") if name.strip()]
+        if not task_type.strip() or not backends:
+            raise ValueError(f"Invalid LLM route: {rule!r} (expected task_type=backend|backend)")
+        routes[task_type.strip()] = backends
+    return routes
+
+
+class BackendStats:
+    """
+    Rolling latency and error rate of one backend, plus calls in flight.
+    
+    Keeps the last ``window`` call outcomes; p50/p95 are recomputed when a
+    call completes, so routing reads them in O(1).
+    """
+    
+    def __init__(self, window: int = 100):
+        self._latencies: Deque[float] = deque(maxlen=window)
+        self._outcomes: Deque[bool] = deque(maxlen=window)
+        self.p50 = 0.0
+        self.p95 = 0.0
+        self.in_flight = 0
+    
+    @property
+    def samples(self) -> int:
+        return len(self._outcomes)
+    
+    @property
+    def error_rate(self) -> float:
+        return 1 - sum(self._outcomes) / len(self._outcomes) if self._outcomes else 0.0
+    
+    def record(self, seconds: float, ok: bool):
+        self._outcomes.append(ok)
+        if ok:
+            self._latencies.append(seconds)
+            ordered = sorted(self._latencies)
+            self.p50 = ordered[len(ordered) // 2]
+            self.p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    
+    def score(self) -> float:
+        """Expected cost of one more call: blended latency, scaled by load and errors (lower is better)."""
+        latency = (self.p50 + self.p95) / 2
+        return latency * (1 + self.in_flight) / max(0.05, 1 - self.error_rate)
+    
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "samples": self.samples,
+            "p50_seconds": round(self.p50, 4),
+            "p95_seconds": round(self.p95, 4),
+            "error_rate": round(self.error_rate, 4),
+            "in_flight": self.in_flight,
+        }
+
+
+class LLMRouter:
+    """
+    Orders backends for each call by health, load and observed latency.
+    
+    A ``task_type`` with a route only uses the backends named in it (e.g.
+    fast, cheap models for routine ``risk_assessment``); other task types
+    use every backend. Within that pool, backends with an open circuit go
+    last, barely measured ones go first, and the rest are ordered by their
+    rolling p50/p95 latency, error rate and calls in flight.
+    """
+    
+    def __init__(self, backends: List[LLMBackend], routes: Dict[str, List[str]] = None, window: int = 100):
+        if not backends:
+            raise ValueError("LLMRouter needs at least one backend")
+        self.backends = backends
+        self.by_name = {backend.name: backend for backend in backends}
+        self.routes = routes or {}
+        for task_type, names in self.routes.items():
+            unknown = [name for name in names if name not in self.by_name]
+            if unknown:
+                raise ValueError(f"LLM route for {task_type} names unknown backends: {', '.join(unknown)}")
+        self.stats = {backend.name: BackendStats(window) for backend in backends}
+        self._lock = threading.Lock()
+    
+    def candidates(self, task_type: str = None) -> List[LLMBackend]:
+        """Backends allowed for a task type, in configuration order."""
+        names = self.routes.get(task_type) if task_type else None
+        return [self.by_name[name] for name in names] if names else list(self.backends)
+    
+    def order(self, task_type: str = None) -> List[LLMBackend]:
+        """Candidates in the order they should be tried."""
+        backends = self.candidates(task_type)
+        random.shuffle(backends)  # break ties between equally good backends
+        with self._lock:
+            def rank(backend: LLMBackend):
+                stats = self.stats[backend.name]
+                return (backend.breaker.state == "open", stats.samples >= MIN_SAMPLES, stats.score())
+            return sorted(backends, key=rank)
+    
+    def started(self, backend: LLMBackend):
+        """Count a call in flight on ``backend``."""
+        with self._lock:
+            self.stats[backend.name].in_flight += 1
+    
+    def finished(self, backend: LLMBackend, seconds: float, ok: Optional[bool]):
+        """Record the outcome of a call started with ``started`` (None: abandoned, not recorded)."""
+        with self._lock:
+            stats = self.stats[backend.name]
+            stats.in_flight -= 1
+            if ok is not None:
+                stats.record(seconds, ok)
+    
+    @contextmanager
+    def track(self, backend: LLMBackend):
+        """Time the enclosed call on ``backend``; backends outside the router are not tracked."""
+        if self.by_name.get(backend.name) is not backend:
+            yield
+            return
+        self.started(backend)
+        start = time.perf_counter()
+        ok = None  # stays None when the call is cancelled or the stream abandoned
+        try:
+            yield
+            ok = True
+        except Exception:
+            ok = False
+            raise
+        finally:
+            self.finished(backend, time.perf_counter() - start, ok)
+    
+    def status(self) -> List[Dict[str, Any]]:
+        """Per-backend circuit state, counters and rolling latency."""
+        with self._lock:
+            return [{**backend.status(), **self.stats[backend.name].snapshot()} for backend in self.backends]
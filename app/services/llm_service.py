@@ -1,85 +1,231 @@
 """LLM service for generating responses."""
-from typing import Optional, Dict
-
-# Optional imports
-try:
-    import openai
-    HAS_OPENAI = True
-except ImportError:
-    HAS_OPENAI = False
-    openai = None
-
-try:
-    from anthropic import Anthropic
-    HAS_ANTHROPIC = True
-except ImportError:
-    HAS_ANTHROPIC = False
-    Anthropic = None
+from typing import Optional, Dict, Any, AsyncIterator, List
 
+from app.services.llm_cache import LLMResponseCache, cache_key
+from app.services.llm_client import LLMBackend, LLMUnavailableError
+from app.services.llm_router import LLMRouter, parse_backend_spec, parse_routes
 from app.core.config import (
-    OPENAI_API_KEY, ANTHROPIC_API_KEY, LLM_PROVIDER, LLM_MODEL, USE_MOCK_LLM
+    LLM_PROVIDER, LLM_MODEL, LLM_BASE_URL, USE_MOCK_LLM, LLM_FALLBACK_PROVIDER, LLM_FALLBACK_MODEL,
+    LLM_BACKENDS, LLM_ROUTES, LLM_ROUTER_WINDOW, LLM_CACHE_ENABLED, LLM_CACHE_MAX_ENTRIES,
+    LLM_CACHE_TTL_SECONDS, LLM_CACHE_SQLITE_PATH
 )
 
 
 class LLMService:
-    """Unified LLM service supporting OpenAI and Anthropic."""
+    """
+    Unified LLM service supporting OpenAI, Anthropic and OpenAI-compatible servers.
     
-    def __init__(self, provider: str = None, model: str = None, use_mock: bool = None):
+    Calls are routed across the configured backends (pooled clients,
+    deadlines, retries, circuit breakers) by task type and observed latency
+    and, when they all fail or their circuits are open, to the fallback: a
+    secondary provider or the mock responses. Without a fallback the
+    failure is raised as LLMUnavailableError instead of being returned as text.
+    """
+    
+    def __init__(self, provider: str = None, model: str = None, use_mock: bool = None,
+                 cache: LLMResponseCache = None, fallback_provider: str = None,
+                 fallback_model: str = None, backends: str = None, routes: str = None):
         self.provider = provider or LLM_PROVIDER
         self.model = model or LLM_MODEL
         self.use_mock = use_mock if use_mock is not None else USE_MOCK_LLM
+        self.cache = cache
+        if self.cache is None and LLM_CACHE_ENABLED:
+            self.cache = LLMResponseCache(LLM_CACHE_MAX_ENTRIES, LLM_CACHE_TTL_SECONDS,
+                                          LLM_CACHE_SQLITE_PATH)
+        self.router: Optional[LLMRouter] = None
+        self.fallback: Optional[LLMBackend] = None
+        self.fallback_to_mock = False
+        self.fallbacks = 0
         
-        if self.use_mock:
-            self.client = None
+        # An explicitly chosen provider overrides the LLM_BACKENDS list
+        if backends is None:
+            backends = LLM_BACKENDS if provider is None else ""
+        specs = [spec for spec in backends.split(",") if spec.strip()]
+        if self.use_mock or (not specs and self.provider not in ("openai", "anthropic")):
             self.provider = "mock"
-        elif self.provider == "openai":
-            if not HAS_OPENAI:
-                raise ValueError("openai package not installed")
-            if not OPENAI_API_KEY:
-                raise ValueError("OPENAI_API_KEY not set")
-            self.client = openai.OpenAI(api_key=OPENAI_API_KEY)
-        elif self.provider == "anthropic":
-            if not HAS_ANTHROPIC:
-                raise ValueError("anthropic package not installed")
-            if not ANTHROPIC_API_KEY:
-                raise ValueError("ANTHROPIC_API_KEY not set")
-            self.client = Anthropic(api_key=ANTHROPIC_API_KEY)
+            return
+        
+        if specs:
+            self.router = LLMRouter(self._create_backends(specs),
+                                    parse_routes(LLM_ROUTES if routes is None else routes),
+                                    LLM_ROUTER_WINDOW)
         else:
-            self.client = None
-            self.provider = "mock"
+            base_url = LLM_BASE_URL if self.provider == "openai" else None
+            self.router = LLMRouter([LLMBackend(self.provider, self.model, base_url)])
+        if len(self.router.backends) > 1:
+            self.provider = "router"
+            self.model = ",".join(backend.name for backend in self.router.backends)
+        else:
+            self.provider, self.model = self.router.backends[0].provider, self.router.backends[0].model
+        
+        fallback_provider = fallback_provider if fallback_provider is not None else LLM_FALLBACK_PROVIDER
+        if fallback_provider == "mock":
+            self.fallback_to_mock = True
+        elif fallback_provider:
+            try:
+                self.fallback = LLMBackend(fallback_provider, fallback_model or LLM_FALLBACK_MODEL
+                                           or self.router.backends[0].model)
+            except ValueError as e:
+                print(f"⚠️  LLM fallback {fallback_provider} unavailable: {e}")
     
-    def generate(self, prompt: str, system_prompt: str = None, max_tokens: int = 500) -> str:
+    @staticmethod
+    def _create_backends(specs: List[str]) -> List[LLMBackend]:
+        """Backends for ``[name=]provider:model[@base_url]`` specs, skipping unusable ones."""
+        backends, errors = [], []
+        for spec in specs:
+            name, provider, model, base_url = parse_backend_spec(spec)
+            try:
+                backends.append(LLMBackend(provider, model, base_url, name=name))
+            except ValueError as e:
+                errors.append(f"{spec.strip()}: {e}")
+                print(f"⚠️  LLM backend {spec.strip()} unavailable: {e}")
+        if not backends:
+            raise ValueError("No usable LLM backend: " + "; ".join(errors))
+        return backends
+    
+    def _backends(self, task_type: str = None) -> List[LLMBackend]:
+        """Backends to try for a task type, in order."""
+        return self.router.order(task_type) + ([self.fallback] if self.fallback else [])
+    
+    def _cache_key(self, system_prompt: str, prompt: str, max_tokens: int, task_type: str = None) -> str:
+        """Cache key for a call; backends that may serve the task type share answers."""
+        candidates = self.router.candidates(task_type)
+        if len(candidates) == 1:
+            provider, model = candidates[0].provider, candidates[0].model
+        else:
+            provider, model = "router", ",".join(backend.name for backend in candidates)
+        return cache_key(provider, model, system_prompt, prompt, max_tokens)
+    
+    def _unavailable(self, prompt: str, errors: List[str]) -> str:
+        """Mock answer when falling back to it, otherwise raise the collected errors."""
+        if self.fallback_to_mock:
+            self.fallbacks += 1
+            return self._mock_generate(prompt)
+        raise LLMUnavailableError("; ".join(errors))
+    
+    def generate(self, prompt: str, system_prompt: str = None, max_tokens: int = 500,
+                 task_type: str = None) -> str:
         """Generate response from LLM."""
         if self.use_mock or self.provider == "mock":
             return self._mock_generate(prompt)
         
-        try:
-            if self.provider == "openai":
-                messages = []
-                if system_prompt:
-                    messages.append({"role": "system", "content": system_prompt})
-                messages.append({"role": "user", "content": prompt})
-                
-                response = self.client.chat.completions.create(
-                    model=self.model,
-                    messages=messages,
-                    max_tokens=max_tokens,
-                    temperature=0.7
-                )
-                return response.choices[0].message.content
-            
-            elif self.provider == "anthropic":
-                system_msg = system_prompt or ""
-                response = self.client.messages.create(
-                    model=self.model,
-                    max_tokens=max_tokens,
-                    system=system_msg,
-                    messages=[{"role": "user", "content": prompt}]
-                )
-                return response.content[0].text
+        key = self._cache_key(system_prompt, prompt, max_tokens, task_type)
+        cached = self.cache.get(key) if self.cache else None
+        if cached is not None:
+            return cached
+        
+        errors = []
+        for backend in self._backends(task_type):
+            try:
+                with self.router.track(backend):
+                    text = backend.generate(prompt, system_prompt, max_tokens)
+            except LLMUnavailableError as e:
+                errors.append(str(e))
+                continue
+            return self._on_success(key, text, backend)
+        return self._unavailable(prompt, errors)
+    
+    async def agenerate(self, prompt: str, system_prompt: str = None, max_tokens: int = 500,
+                        task_type: str = None) -> str:
+        """Generate response from LLM without blocking the event loop."""
+        if self.use_mock or self.provider == "mock":
+            return self._mock_generate(prompt)
+        
+        key = self._cache_key(system_prompt, prompt, max_tokens, task_type)
+        cached = await self.cache.aget(key) if self.cache else None
+        if cached is not None:
+            return cached
+        
+        errors = []
+        for backend in self._backends(task_type):
+            try:
+                with self.router.track(backend):
+                    text = await backend.agenerate(prompt, system_prompt, max_tokens)
+            except LLMUnavailableError as e:
+                errors.append(str(e))
+                continue
+            return self._on_success(key, text, backend)
+        return self._unavailable(prompt, errors)
+    
+    async def astream(self, prompt: str, system_prompt: str = None, max_tokens: int = 500,
+                      task_type: str = None) -> AsyncIterator[str]:
+        """
+        Generate a response from the LLM, yielding text as the provider streams it.
+        
+        Cached and mock responses are yielded at once. A backend that fails
+        before sending any text is replaced by the next one; a failure in
+        the middle of a stream is raised as LLMUnavailableError. The full
+        text is cached only when the stream completes.
+        """
+        if self.use_mock or self.provider == "mock":
+            yield self._mock_generate(prompt)
+            return
+        
+        key = self._cache_key(system_prompt, prompt, max_tokens, task_type)
+        cached = await self.cache.aget(key) if self.cache else None
+        if cached is not None:
+            yield cached
+            return
         
-        except Exception as e:
-            return f"Error generating response: {str(e)}"
+        errors = []
+        for backend in self._backends(task_type):
+            parts = []
+            try:
+                with self.router.track(backend):
+                    async for delta in backend.astream(prompt, system_prompt, max_tokens):
+                        parts.append(delta)
+                        yield delta
+            except LLMUnavailableError as e:
+                if parts:
+                    raise
+                errors.append(str(e))
+                continue
+            self._on_success(key, "".join(parts), backend)
+            return
+        yield self._unavailable(prompt, errors)
+    
+    def _on_success(self, key: str, text: str, backend: LLMBackend) -> str:
+        """Cache a routed response (fallback answers are not cached under the routed key)."""
+        if backend is self.fallback:
+            self.fallbacks += 1
+        elif self.cache and text:
+            self.cache.set(key, text)
+        return text
+    
+    @property
+    def circuit_state(self) -> str:
+        """Provider health as seen from recent calls: the state of the healthiest backend ("closed" is healthy)."""
+        if not self.router:
+            return "closed"
+        states = {backend.breaker.state for backend in self.router.backends}
+        for state in ("closed", "half_open"):
+            if state in states:
+                return state
+        return "open"
+    
+    @property
+    def consecutive_failures(self) -> int:
+        return min((b.breaker.consecutive_failures for b in self.router.backends), default=0) if self.router else 0
+    
+    @property
+    def last_error(self) -> Optional[str]:
+        errors = [b.breaker.last_error for b in self.router.backends if b.breaker.last_error] if self.router else []
+        return errors[-1] if errors else None
+    
+    def status(self) -> Dict[str, Any]:
+        """Cached provider state for readiness probes (makes no network calls)."""
+        return {
+            "provider": self.provider,
+            "model": self.model,
+            "circuit_state": self.circuit_state,
+            "consecutive_failures": self.consecutive_failures,
+            "last_error": self.last_error,
+            "cache": self.cache.stats() if self.cache else None,
+            "backends": self.router.status() if self.router else [],
+            "routes": self.router.routes if self.router else {},
+            "fallback": "mock" if self.fallback_to_mock else (self.fallback.name if self.fallback else None),
+            "fallbacks": self.fallbacks,
+        }
     
     def _mock_generate(self, prompt: str) -> str:
         """Generate mock response for testing."""
@@ -0,0 +1,99 @@
+"""Columnar arrays over MemoryEntry fields used for filtering and stats."""
+import sys
+from datetime import datetime
+from typing import Dict, List
+
+import numpy as np
+
+from app.models.memory import MemoryEntry
+
+
+def timestamp_us(timestamp: str) -> int:
+    """ISO timestamp as int64 microseconds since the epoch (0 if unparseable)."""
+    try:
+        return int(datetime.fromisoformat(timestamp).timestamp() * 1_000_000)
+    except (TypeError, ValueError):
+        return 0
+
+
+class MemoryColumns:
+    """
+    Parallel columns for a list of memories, row ``i`` describing memory ``i``.
+    
+    ``task_type`` is stored as an int32 code into an interned vocabulary,
+    ``success`` as a boolean mask and ``timestamp`` as int64 microseconds,
+    and ``seq`` numbers rows in insertion order (stable across removals),
+    so stats and the secondary indexes read them as NumPy arrays instead of
+    looping over entry objects. Arrays grow geometrically like a list.
+    """
+    
+    def __init__(self):
+        self.types: List[str] = []
+        self.type_codes: Dict[str, int] = {}
+        self._n = 0
+        self.next_seq = 0
+        self._type = np.zeros(0, dtype='int32')
+        self._success = np.zeros(0, dtype=bool)
+        self._timestamp = np.zeros(0, dtype='int64')
+        self._seq = np.zeros(0, dtype='int64')
+    
+    def __len__(self) -> int:
+        return self._n
+    
+    @property
+    def task_type(self) -> "np.ndarray":
+        return self._type[:self._n]
+    
+    @property
+    def success(self) -> "np.ndarray":
+        return self._success[:self._n]
+    
+    @property
+    def timestamp(self) -> "np.ndarray":
+        return self._timestamp[:self._n]
+    
+    @property
+    def seq(self) -> "np.ndarray":
+        return self._seq[:self._n]
+    
+    def _code(self, task_type: str) -> int:
+        code = self.type_codes.get(task_type)
+        if code is None:
+            code = self.type_codes[sys.intern(task_type)] = len(self.types)
+            self.types.append(task_type)
+        return code
+    
+    def _reserve(self, n: int):
+        if n <= len(self._type):
+            return
+        capacity = max(n, 2 * len(self._type), 1024)
+        for name in ("_type", "_success", "_timestamp", "_seq"):
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[:self._n] = old[:self._n]
+            setattr(self, name, new)
+    
+    def extend(self, memories: List[MemoryEntry]):
+        """Append rows for new memories."""
+        start, end = self._n, self._n + len(memories)
+        self._reserve(end)
+        self._type[start:end] = [self._code(m.task_type) for m in memories]
+        self._success[start:end] = [bool(m.success) for m in memories]
+        self._timestamp[start:end] = [timestamp_us(m.timestamp) for m in memories]
+        self._seq[start:end] = np.arange(self.next_seq, self.next_seq + len(memories))
+        self.next_seq += len(memories)
+        self._n = end
+    
+    def reset(self, memories: List[MemoryEntry]):
+        """Rebuild all columns from ``memories``."""
+        self._n = 0
+        self.next_seq = 0
+        self.extend(memories)
+    
+    def keep(self, positions: List[int]):
+        """Keep only the rows at ``positions`` (in order), renumbering them from 0."""
+        positions = np.asarray(positions, dtype='int64')
+        for name in ("_type", "_success", "_timestamp", "_seq"):
+            column = getattr(self, name)
+            column[:len(positions)] = column[positions]
+        self._n = len(positions)
@@ -0,0 +1,160 @@
+"""Append-only write-ahead log for memory persistence."""
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import List, Dict
+
+from app.core.config import MEMORY_WAL_FSYNC_EVERY, MEMORY_COMPACT_EVERY
+
+
+class MemoryLog:
+    """
+    Snapshot + append-only JSONL write-ahead log for a memory file.
+    
+    The snapshot keeps the original ``memory.json`` format (a JSON list of
+    entries). Every add is appended to ``<stem>.wal.jsonl`` and the log is
+    folded back into the snapshot every ``compact_every`` records, so the
+    per-write cost stays constant as the store grows.
+    
+    The log's first record holds a SHA-256 of the snapshot it extends, so a
+    log left behind by an interrupted compaction is recognized by content,
+    and copying or restoring the files (which changes their mtime) keeps it.
+    """
+    
+    def __init__(self, snapshot_file: Path, fsync_every: int = None,
+                 compact_every: int = None):
+        self.snapshot_file = Path(snapshot_file)
+        self.wal_file = self.snapshot_file.with_name(self.snapshot_file.stem + ".wal.jsonl")
+        self.fsync_every = max(1, fsync_every or MEMORY_WAL_FSYNC_EVERY)
+        self.compact_every = max(1, compact_every or MEMORY_COMPACT_EVERY)
+        self.wal_records = 0
+        self._unsynced = 0
+        self._fh = None
+        self._snapshot_digest = None  # hashed on load/compact, or lazily
+    
+    def load(self) -> List[Dict]:
+        """Read the snapshot and replay the WAL on top of it."""
+        records: List[Dict] = []
+        data = None
+        if self.snapshot_file.exists():
+            with open(self.snapshot_file, 'rb') as f:
+                data = f.read()
+            records = json.loads(data)
+        self._snapshot_digest = self._digest(data)
+        
+        self.wal_records = 0
+        if self.wal_file.exists():
+            self._replay(records)
+        return records
+    
+    def _replay(self, records: List[Dict]):
+        """Apply WAL records, truncating a torn tail left by a crash."""
+        good_offset = 0
+        ops = []
+        header = None
+        with open(self.wal_file, 'rb') as f:
+            for raw in f:
+                if not raw.endswith(b"\n"):
+                    break
+                try:
+                    record = json.loads(raw)
+                except ValueError:
+                    break
+                good_offset += len(raw)
+                if record.get("op") == "base":
+                    header = record
+                else:
+                    ops.append(record)
+        
+        if good_offset < self.wal_file.stat().st_size:
+            print(f"⚠️  Recovered torn write-ahead log tail in {self.wal_file.name}")
+            with open(self.wal_file, 'r+b') as f:
+                f.truncate(good_offset)
+        
+        if header is not None and not self._extends_snapshot(header):
+            # The snapshot was rewritten after this log started (crash between
+            # compaction and log truncation): its records are already folded in.
+            self._reset_wal()
+            return
+        
+        for record in ops:
+            if record.get("op") == "add":
+                records.append(record["memory"])
+        self.wal_records = len(ops)
+    
+    def append(self, memories: List[Dict]):
+        """Append memory records to the WAL, fsyncing in batches."""
+        if not memories:
+            return
+        fh = self._open()
+        for memory in memories:
+            fh.write(json.dumps({"op": "add", "memory": memory}) + "\n")
+        fh.flush()
+        self.wal_records += len(memories)
+        self._unsynced += len(memories)
+        if self._unsynced >= self.fsync_every:
+            self.sync()
+    
+    def needs_compaction(self) -> bool:
+        """Whether the WAL has grown enough to fold into the snapshot."""
+        return self.wal_records >= self.compact_every
+    
+    def compact(self, memories: List[Dict]):
+        """Atomically write a new snapshot and start an empty WAL."""
+        data = json.dumps(memories, indent=2).encode("utf-8")
+        tmp_file = self.snapshot_file.with_name(self.snapshot_file.name + ".tmp")
+        with open(tmp_file, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, self.snapshot_file)
+        self._snapshot_digest = self._digest(data)
+        self._reset_wal()
+    
+    def sync(self):
+        """Flush and fsync pending WAL writes."""
+        if self._fh is not None and self._unsynced:
+            self._fh.flush()
+            os.fsync(self._fh.fileno())
+        self._unsynced = 0
+    
+    def close(self):
+        """Sync and close the WAL file handle."""
+        if self._fh is not None:
+            self.sync()
+            self._fh.close()
+            self._fh = None
+    
+    def _open(self):
+        if self._fh is None:
+            is_new = not self.wal_file.exists() or self.wal_file.stat().st_size == 0
+            self._fh = open(self.wal_file, 'a')
+            if is_new:
+                self._fh.write(json.dumps(self._base_record()) + "\n")
+        return self._fh
+    
+    def _reset_wal(self):
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+        if self.wal_file.exists():
+            self.wal_file.unlink()
+        self.wal_records = 0
+        self._unsynced = 0
+    
+    @staticmethod
+    def _digest(data) -> str:
+        """Content hash of snapshot bytes ("" when there is no snapshot)."""
+        return hashlib.sha256(data).hexdigest() if data is not None else ""
+    
+    def _base_record(self) -> Dict:
+        """Identify the snapshot a WAL was started against."""
+        if self._snapshot_digest is None:
+            data = self.snapshot_file.read_bytes() if self.snapshot_file.exists() else None
+            self._snapshot_digest = self._digest(data)
+        return {"op": "base", "sha256": self._snapshot_digest}
+    
+    def _extends_snapshot(self, header: Dict) -> bool:
+        """Whether a WAL header names the current snapshot (by its SHA-256)."""
+        return header.get("sha256") == self._snapshot_digest
@@ -1,120 +1,611 @@
 """Memory service for vector-based semantic search."""
+import asyncio
+import atexit
+import hashlib
 import json
+import os
+import threading
+import time
+from concurrent.futures import Future
+from datetime import datetime
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Any
+
+import numpy as np
 
 # Optional vector dependencies
 try:
-    import numpy as np
     import faiss
     from sentence_transformers import SentenceTransformer
     HAS_VECTOR_DEPS = True
 except ImportError:
     HAS_VECTOR_DEPS = False
-    np = None
     faiss = None
     SentenceTransformer = None
 
 from app.models.memory import MemoryEntry
+from app.services.memory_log import MemoryLog
+from app.services.memory_columns import MemoryColumns
+from app.services.memory_stats import MemoryStats
+from app.services.secondary_index import SecondaryIndex, SortKey
+from app.services.text_index import TextIndex, memory_text
+from app.services.hybrid_search import FUSION_METHODS, fuse
+from app.services.embedding_store import EmbeddingCache, EmbeddingStore, content_hash
+from app.services.vector_index import PartitionedIndex
+from app.services.eviction import MemoryUsage, get_eviction_policy, select_victims
+from app.services.consolidation import cluster_near_duplicates, merge_memories
+from app.utils.executors import run_in_encode_pool, run_in_persist_pool
+from app.utils.locks import ReadWriteLock
 from app.core.config import (
-    EMBEDDING_MODEL, VECTOR_DIM, FAISS_INDEX_PATH, MEMORY_FILE, TOP_K_RETRIEVAL
+    EMBEDDING_MODEL, VECTOR_DIM, FAISS_INDEX_SUFFIX, EMBEDDING_CACHE_SIZE, MEMORY_FILE,
+    TOP_K_RETRIEVAL, MAX_MEMORY_ENTRIES, MEMORY_EVICTION_POLICY, MEMORY_EVICTION_HEADROOM,
+    CONSOLIDATION_MAX_DISTANCE, CONSOLIDATION_NEIGHBOURS, CONSOLIDATION_BATCH_SIZE, STATS_WINDOWS_SECONDS, RETRIEVAL_MODE, HYBRID_CANDIDATES,
+    HYBRID_FUSION, HYBRID_RRF_K, HYBRID_VECTOR_WEIGHT, RERANK_TOP_N
 )
 
+RETRIEVAL_MODES = ("vector", "text", "hybrid")
+
 
 class MemoryService:
-    """Vector-based memory service with semantic search."""
+    """
+    Vector-based memory service with semantic search.
+    
+    The store holds at most ``max_entries`` memories (0 = unbounded); when it
+    grows past that, ``eviction_policy`` (a name from
+    ``eviction.EVICTION_POLICIES`` or a custom callable) picks the memories to
+    drop from the list, the FAISS index and the on-disk snapshot.
+    
+    ``retrieval_mode`` picks vector, BM25 text or hybrid search; hybrid fuses
+    the top ``hybrid_candidates`` of both and, given a ``reranker``, rescores
+    the fused top ``rerank_top_n`` with it.
     
-    def __init__(self, memory_file: Path = None, use_vector: bool = True):
+    Concurrency: searches and other reads share a reader-writer lock, so
+    they run in parallel and see the list, columns and indexes at a
+    consistent point. Writers are serialized by a separate lock and take the
+    shared lock exclusively only while mutating memory; encoding, log
+    appends and snapshots happen outside it, so reads are not held up by
+    disk I/O. ``aadd_memories`` calls queued while a write is in progress are
+    committed together in one batch.
+    """
+    
+    def __init__(self, memory_file: Path = None, use_vector: bool = True, encoder=None,
+                 max_entries: int = None, eviction_policy=None, retrieval_mode: str = None,
+                 reranker=None):
         self.memory_file = memory_file or MEMORY_FILE
+        self.index_path = self.memory_file.with_suffix(FAISS_INDEX_SUFFIX)
+        self.manifest_file = self.memory_file.with_name(self.memory_file.stem + ".manifest.json")
         self.use_vector = use_vector and HAS_VECTOR_DEPS
         self.memories: List[MemoryEntry] = []
+        self.columns = MemoryColumns()
+        self.stats = MemoryStats(STATS_WINDOWS_SECONDS)
+        self.secondary = SecondaryIndex()
+        self.text_index = TextIndex()
+        self._usage: List[MemoryUsage] = []
+        self.max_entries = MAX_MEMORY_ENTRIES if max_entries is None else max_entries
+        self.eviction_policy = get_eviction_policy(eviction_policy or MEMORY_EVICTION_POLICY)
+        self.evicted = 0
+        self.retrieval_mode = retrieval_mode or RETRIEVAL_MODE
+        if self.retrieval_mode not in RETRIEVAL_MODES:
+            raise ValueError(f"Unknown retrieval mode: {self.retrieval_mode} (choose from {', '.join(RETRIEVAL_MODES)})")
+        if HYBRID_FUSION not in FUSION_METHODS:
+            raise ValueError(f"Unknown fusion method: {HYBRID_FUSION} (choose from {', '.join(FUSION_METHODS)})")
+        self.hybrid_candidates = HYBRID_CANDIDATES
+        self.rerank_top_n = RERANK_TOP_N
+        self.reranker = reranker
         self.index = None
         self.encoder = None
+        self.log = MemoryLog(self.memory_file)
+        self.embeddings = None
+        self.embedding_cache = EmbeddingCache(EMBEDDING_CACHE_SIZE)
+        self._hashes: List[str] = []
+        self.last_persist_at: Optional[str] = None
+        self._lock = ReadWriteLock()  # in-memory state: shared for reads, exclusive for mutation
+        self._writer = threading.RLock()  # serializes writers, including their disk I/O
+        self._usage_lock = threading.Lock()  # usage counters updated by concurrent readers
+        self._pending: List[tuple] = []  # (memories, embeddings, future) awaiting a batched write
+        self._pending_lock = threading.Lock()
         
         if self.use_vector:
-            self._init_vector_search()
+            self._init_vector_search(encoder)
         
         self.load_memories()
+        atexit.register(self.close)
     
-    def _init_vector_search(self):
+    def _init_vector_search(self, encoder=None):
         """Initialize vector search components."""
         try:
-            self.encoder = SentenceTransformer(EMBEDDING_MODEL)
+            self.encoder = encoder or SentenceTransformer(EMBEDDING_MODEL)
+            self.embeddings = EmbeddingStore(self.memory_file, EMBEDDING_MODEL, VECTOR_DIM)
             self._build_index()
         except Exception as e:
             print(f"⚠️  Vector search initialization failed: {e}")
             self.use_vector = False
     
     def _build_index(self):
-        """Build or load FAISS index."""
-        try:
-            if FAISS_INDEX_PATH.exists():
-                self.index = faiss.read_index(str(FAISS_INDEX_PATH))
-            else:
-                self.index = faiss.IndexFlatL2(VECTOR_DIM)
-        except:
-            self.index = faiss.IndexFlatL2(VECTOR_DIM)
+        """Create an empty partitioned FAISS index."""
+        self.index = PartitionedIndex(VECTOR_DIM)
+    
+    @staticmethod
+    def _memory_text(memory: MemoryEntry) -> str:
+        """Text that is embedded (and BM25-indexed) for a memory entry."""
+        return memory_text(memory)
     
     def _encode_text(self, text: str):
         """Encode text to vector embedding."""
         if not self.use_vector or not self.encoder:
             return None
         try:
-            embedding = self.encoder.encode([text], convert_to_numpy=True)
-            return embedding[0].astype('float32')
+            return self._encode_texts([text])[0]
         except:
             return None
     
+    def _encode_texts(self, texts: List[str], hashes: List[str] = None):
+        """
+        Embed texts through the LRU embedding cache.
+        
+        Only texts not seen recently are sent to the encoder, in one call,
+        and their embeddings are cached for later queries and adds.
+        """
+        hashes = hashes or [content_hash(text) for text in texts]
+        matrix = np.zeros((len(texts), VECTOR_DIM), dtype='float32')
+        missing: Dict[str, List[int]] = {}
+        for pos, key in enumerate(hashes):
+            vector = self.embedding_cache.get(key)
+            if vector is None:
+                missing.setdefault(key, []).append(pos)
+            else:
+                matrix[pos] = vector
+        
+        if missing:
+            first = [positions[0] for positions in missing.values()]
+            encoded = self.encoder.encode([texts[pos] for pos in first], convert_to_numpy=True).astype('float32')
+            for (key, positions), vector in zip(missing.items(), encoded):
+                matrix[positions] = vector
+                self.embedding_cache.put(key, vector.copy())
+        return matrix
+    
+    def encode_queries(self, texts: List[str]):
+        """Embed query texts as one matrix, or None when vector search is unavailable."""
+        if not self.use_vector or not self.encoder or not texts:
+            return None
+        try:
+            return self._encode_texts(list(texts))
+        except Exception:
+            return None
+    
+    def _encode_memories(self, memories: List[MemoryEntry], hashes: List[str]):
+        """Embed memories, encoding only those missing from the sidecar."""
+        matrix, missing = self.embeddings.get(hashes)
+        if missing:
+            texts = [self._memory_text(memories[pos]) for pos in missing]
+            matrix[missing] = self._encode_texts(texts, [hashes[pos] for pos in missing])
+        return matrix
+    
+    def _embed_memories(self, memories: List[MemoryEntry], hashes: List[str]):
+        """Embed memories and persist new embeddings to the sidecar."""
+        matrix = self._encode_memories(memories, hashes)
+        self.embeddings.append(hashes, matrix)
+        return matrix
+    
+    def encode_memories(self, memories: List[MemoryEntry]):
+        """Embeddings for memory entries, or None when not using vector search."""
+        if not self.use_vector or not self.index:
+            return None
+        hashes = [content_hash(self._memory_text(m)) for m in memories]
+        return self._encode_memories(memories, hashes)
+    
     def load_memories(self):
         """Load memories from file."""
         try:
-            if self.memory_file.exists():
-                with open(self.memory_file, 'r') as f:
-                    data = json.load(f)
-                    self.memories = [MemoryEntry.from_dict(entry) for entry in data]
+            if self.memory_file.exists() or self.log.wal_file.exists():
+                data = self.log.load()
+                self.memories = [MemoryEntry.from_dict(entry) for entry in data]
+                self.columns.reset(self.memories)
+                self.stats.reset(self.columns)
+                self.stats.record_outcomes(self.columns.timestamp, self.columns.success)
+                self._reindex()
+                self._usage = [MemoryUsage.for_memory(m) for m in self.memories]
                 
-                # Rebuild index if using vector search
+                # Restore index from disk and persisted embeddings if using vector search
                 if self.use_vector and self.index:
-                    self.index = faiss.IndexFlatL2(VECTOR_DIM)
-                    for memory in self.memories:
-                        text = f"{memory.task} {memory.solution} {' '.join(memory.key_insights)}"
-                        embedding = self._encode_text(text)
-                        if embedding is not None:
-                            embedding = embedding.reshape(1, -1)
-                            self.index.add(embedding)
+                    self._restore_index()
                 
                 print(f"✅ Loaded {len(self.memories)} memories")
+                self._enforce_capacity()
             else:
                 self.memories = []
+                self.columns.reset([])
+                self.stats.reset(self.columns)
+                self._reindex()
+                self._usage = []
         except Exception as e:
             print(f"⚠️  Error loading memories: {e}")
             self.memories = []
+            self.columns.reset([])
+            self.stats.reset(self.columns)
+            self._reindex()
+            self._usage = []
     
-    def save_memories(self):
-        """Save memories to file."""
+    def _restore_index(self):
+        """Load this store's FAISS index, repairing it against the memories."""
         try:
-            with open(self.memory_file, 'w') as f:
-                json.dump([m.to_dict() for m in self.memories], f, indent=2)
+            self.embeddings.load()
+            self._hashes = [content_hash(self._memory_text(m)) for m in self.memories]
+            index = self._read_index()
+            if index is None:
+                index = PartitionedIndex(VECTOR_DIM)
             
-            if self.use_vector and self.index:
-                faiss.write_index(self.index, str(FAISS_INDEX_PATH))
+            # Memories appended after the index was written (the WAL tail) are
+            # added incrementally; a mismatched index is rebuilt from the sidecar.
+            start = index.ntotal
+            if start < len(self.memories):
+                tail = self.memories[start:]
+                index.add(self._embed_memories(tail, self._hashes[start:]),
+                          ids=range(start, len(self.memories)),
+                          keys=[self._partition_key(m) for m in tail])
+            self.index = index
         except Exception as e:
-            print(f"⚠️  Error saving memories: {e}")
+            print(f"⚠️  Error building vector index: {e}")
+            self.use_vector = False
     
-    def add_memory(self, memory: MemoryEntry):
-        """Add memory entry."""
-        self.memories.append(memory)
+    @staticmethod
+    def _partition_key(memory: MemoryEntry):
+        """Index partition a memory belongs to."""
+        return (memory.task_type, bool(memory.success))
+    
+    @staticmethod
+    def _checksum(hashes: List[str]) -> str:
+        """Order-sensitive checksum over memory content hashes."""
+        digest = hashlib.sha256()
+        for key in hashes:
+            digest.update(key.encode("ascii"))
+        return digest.hexdigest()
+    
+    def _read_index(self):
+        """Read the on-disk index if its manifest matches a prefix of the memories."""
+        if not self.index_path.exists() or not self.manifest_file.exists():
+            return None
+        try:
+            with open(self.manifest_file, 'r') as f:
+                manifest = json.load(f)
+            count = manifest.get("count", -1)
+            if (manifest.get("model") != EMBEDDING_MODEL
+                    or manifest.get("dim") != VECTOR_DIM
+                    or not 0 <= count <= len(self._hashes)
+                    or manifest.get("checksum") != self._checksum(self._hashes[:count])):
+                raise ValueError("manifest does not match memories")
+            index = PartitionedIndex.load(self.index_path)
+            if index.ntotal != count or index.dim != VECTOR_DIM:
+                raise ValueError("index size does not match manifest")
+            return index
+        except Exception as e:
+            print(f"⚠️  FAISS index {self.index_path.name} out of sync ({e}), rebuilding")
+            return None
+    
+    def _write_index(self):
+        """Write the FAISS index and its manifest atomically."""
+        tmp_index = self.index_path.with_name(self.index_path.name + ".tmp")
+        self.index.save(tmp_index)
+        os.replace(tmp_index, self.index_path)
         
+        manifest = {
+            "count": self.index.ntotal,
+            "model": EMBEDDING_MODEL,
+            "dim": VECTOR_DIM,
+            "checksum": self._checksum(self._hashes[:self.index.ntotal]),
+        }
+        tmp_manifest = self.manifest_file.with_name(self.manifest_file.name + ".tmp")
+        with open(tmp_manifest, 'w') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_manifest, self.manifest_file)
+    
+    def save_memories(self):
+        """Compact the write-ahead log into a full snapshot of memories and index."""
+        # Only writers mutate the store, so holding the writer lock gives a
+        # stable view without blocking searches during the disk writes.
+        with self._writer:
+            try:
+                self.log.compact([m.to_dict() for m in self.memories])
+                
+                if self.use_vector and self.index:
+                    self.embeddings.compact(self._hashes)
+                    self._write_index()
+                self.last_persist_at = datetime.now().isoformat()
+            except Exception as e:
+                print(f"⚠️  Error saving memories: {e}")
+    
+    def add_memory(self, memory: MemoryEntry, embedding=None):
+        """Add memory entry, optionally with an embedding from encode_memories()."""
+        self.add_memories([memory], embedding)
+    
+    def add_memories(self, memories: List[MemoryEntry], embeddings=None):
+        """Add memory entries with one index insert and one log append."""
+        if not memories:
+            return
+        with self._writer:
+            if embeddings is None:
+                embeddings = self.encode_memories(memories)
+            with self._lock.write():
+                self._append(memories, embeddings)
+                self.stats.record_outcomes(self.columns.timestamp[-len(memories):],
+                                           self.columns.success[-len(memories):])
+            
+            try:
+                self.log.append([m.to_dict() for m in memories])
+                self.last_persist_at = datetime.now().isoformat()
+            except Exception as e:
+                print(f"⚠️  Error saving memories: {e}")
+            
+            self._migrate_index()
+            if not self._enforce_capacity() and self.log.needs_compaction():
+                self.save_memories()
+    
+    def _append(self, memories: List[MemoryEntry], embeddings=None, usage: List[MemoryUsage] = None):
+        """Append memories to the list, the sidecar and the index (no logging)."""
+        start = len(self.memories)
+        self.memories.extend(memories)
+        self.columns.extend(memories)
+        self.stats.add(memories)
+        self.secondary.add(memories, self.columns.timestamp[-len(memories):].tolist(),
+                           self.columns.seq[-len(memories):].tolist())
+        self.text_index.add(memories)
+        self._usage.extend(usage or [MemoryUsage(last_used=time.time()) for _ in memories])
+        
+        if self.use_vector and self.index:
+            keys = [content_hash(self._memory_text(m)) for m in memories]
+            try:
+                if embeddings is None:
+                    embeddings = self._encode_memories(memories, keys)
+                self.embeddings.append(keys, embeddings)
+                # Partitions crossing the switchover are trained by _migrate_index
+                self.index.add(embeddings, ids=range(start, start + len(memories)),
+                               keys=[self._partition_key(m) for m in memories], migrate=False)
+                self._hashes.extend(keys)
+            except Exception as e:
+                print(f"⚠️  Error encoding memory, disabling vector search: {e}")
+                self.use_vector = False
+    
+    def _migrate_index(self):
+        """
+        Train partitions that crossed the switchover and swap them in.
+        
+        Called with the writer lock held, so the partitions cannot change
+        while the (slow) build runs; searches continue until the swap.
+        """
+        if not self.use_vector or not self.index:
+            return
+        for key in self.index.pending_migrations():
+            partition = self.index.build_migration(key)
+            with self._lock.write():
+                self.index.replace(key, partition)
+    
+    def _renumbering(self, positions) -> "np.ndarray":
+        """New index ID of every memory once ``positions`` are removed (-1 for removed ones)."""
+        new_ids = np.arange(len(self.memories), dtype='int64')
+        removed = np.zeros(len(self.memories), dtype=bool)
+        removed[list(positions)] = True
+        new_ids -= np.cumsum(removed)
+        new_ids[removed] = -1
+        return new_ids
+    
+    def _prepare_drop(self, positions):
+        """
+        Build what ``_drop(positions)`` replaces, without the exclusive lock.
+        
+        Returns the rebuilt index partitions and the secondary and text
+        indexes over the survivors; needs the writer lock held so they stay
+        current until ``_drop`` swaps them in.
+        """
+        positions = set(positions)
+        kept = [pos for pos in range(len(self.memories)) if pos not in positions]
+        survivors = [self.memories[pos] for pos in kept]
+        secondary = SecondaryIndex()
+        secondary.rebuild(survivors, self.columns.timestamp[kept].tolist(), self.columns.seq[kept].tolist())
+        text_index = TextIndex(self.text_index.k1, self.text_index.b)
+        text_index.rebuild(survivors)
+        partitions = None
         if self.use_vector and self.index:
-            text = f"{memory.task} {memory.solution} {' '.join(memory.key_insights)}"
-            embedding = self._encode_text(text)
-            if embedding is not None:
-                embedding = embedding.reshape(1, -1)
-                self.index.add(embedding)
+            partitions = self.index.prepare_remap(self._renumbering(positions))
+        return partitions, secondary, text_index
+    
+    def _drop(self, positions, prepared=None) -> List[MemoryEntry]:
+        """Remove memories at ``positions``, renumbering the survivors in the index."""
+        partitions, secondary, text_index = prepared or (None, None, None)
+        positions = set(positions)
+        kept = [pos for pos in range(len(self.memories)) if pos not in positions]
+        dropped = [self.memories[pos] for pos in sorted(positions)]
         
-        self.save_memories()
+        if self.use_vector and self.index:
+            self.index.remap(self._renumbering(positions), partitions)
+            self._hashes = [self._hashes[pos] for pos in kept]
+        self.memories = [self.memories[pos] for pos in kept]
+        self.columns.keep(kept)
+        self.stats.remove(dropped)
+        if secondary is None:
+            self._reindex()
+        else:
+            self.secondary, self.text_index = secondary, text_index
+        self._usage = [self._usage[pos] for pos in kept]
+        return dropped
+    
+    def _reindex(self):
+        """Rebuild the secondary and text indexes from the current memories."""
+        self.secondary.rebuild(self.memories, self.columns.timestamp.tolist(), self.columns.seq.tolist())
+        self.text_index.rebuild(self.memories)
     
-    def search(self, query: str, task_type: str = None, top_k: int = None, 
+    def _enforce_capacity(self) -> bool:
+        """Evict memories once the store exceeds ``max_entries``; True if it did."""
+        if not self.max_entries or len(self.memories) <= self.max_entries:
+            return False
+        target = int(self.max_entries * (1 - MEMORY_EVICTION_HEADROOM))
+        self.evict(len(self.memories) - max(0, target))
+        return True
+    
+    def evict(self, count: int) -> List[MemoryEntry]:
+        """
+        Evict ``count`` memories chosen by the eviction policy.
+        
+        Survivors are renumbered in the FAISS index (so IDs stay equal to
+        list positions) and the snapshot, sidecar and index are rewritten.
+        """
+        with self._writer:
+            with self._usage_lock:
+                victims = select_victims(self.memories, self._usage, count, self.eviction_policy)
+            if not victims:
+                return []
+            prepared = self._prepare_drop(victims)
+            with self._lock.write():
+                evicted = self._drop(victims, prepared)
+                self.evicted += len(evicted)
+            
+            self.save_memories()
+            print(f"✅ Evicted {len(evicted)} memories from {self.memory_file.name}")
+            return evicted
+    
+    def consolidate(self, max_distance: float = None, task_type: str = None) -> Dict[str, Any]:
+        """
+        Merge near-duplicate memories of the same task type.
+        
+        Each memory's candidates are its ``CONSOLIDATION_NEIGHBOURS`` nearest
+        neighbours in the vector index, searched ``CONSOLIDATION_BATCH_SIZE``
+        memories at a time under the shared lock (writers run between
+        batches) and confirmed against the stored embeddings. Each cluster
+        is then replaced by one entry with aggregated attempts/successes and
+        combined insights in a single writer step: only the merged entries
+        are inserted, the rest of the index is renumbered in place, and the
+        store is snapshotted. Clusters that lost a member to a concurrent
+        write are left for the next run.
+        """
+        max_distance = CONSOLIDATION_MAX_DISTANCE if max_distance is None else max_distance
+        with self._lock.read():
+            before = len(self.memories)
+            if not self.use_vector or not self.index or before < 2:
+                return {"memory_file": self.memory_file.name, "before": before,
+                        "after": before, "clusters": 0}
+            positions_by_type: Dict[str, List[int]] = {}
+            for pos, memory in enumerate(self.memories):
+                if not task_type or memory.task_type == task_type:
+                    positions_by_type.setdefault(memory.task_type, []).append(pos)
+            groups = [
+                (key, [self.memories[pos] for pos in positions], [self._hashes[pos] for pos in positions])
+                for key, positions in positions_by_type.items()
+            ]
+        
+        clusters: List[List[MemoryEntry]] = []
+        for key, memories, hashes in groups:
+            for rows in cluster_near_duplicates(self._near_duplicates(key, memories, hashes, max_distance)):
+                clusters.append([memories[row] for row in rows])
+        if not clusters:
+            return {"memory_file": self.memory_file.name, "before": before,
+                    "after": before, "clusters": 0}
+        merged = [merge_memories(cluster) for cluster in clusters]
+        embeddings = self.encode_memories(merged)
+        
+        with self._writer:
+            positions_of = {id(memory): pos for pos, memory in enumerate(self.memories)}
+            current = [i for i, cluster in enumerate(clusters) if all(id(m) in positions_of for m in cluster)]
+            if not current:
+                return {"memory_file": self.memory_file.name, "before": before,
+                        "after": len(self.memories), "clusters": 0}
+            clusters = [[positions_of[id(m)] for m in clusters[i]] for i in current]
+            merged = [merged[i] for i in current]
+            embeddings = embeddings[current] if embeddings is not None else None
+            
+            removed = [pos for cluster in clusters for pos in cluster]
+            prepared = self._prepare_drop(removed)
+            with self._lock.write():
+                usage = [
+                    MemoryUsage(last_used=max(self._usage[pos].last_used for pos in cluster),
+                                hits=sum(self._usage[pos].hits for pos in cluster))
+                    for cluster in clusters
+                ]
+                self._drop(removed, prepared)
+                self._append(merged, embeddings, usage=usage)
+            self._migrate_index()
+            self.save_memories()
+            print(f"✅ Consolidated {before} memories into {len(self.memories)} in {self.memory_file.name}")
+            return {"memory_file": self.memory_file.name, "before": before,
+                    "after": len(self.memories), "clusters": len(clusters)}
+    
+    def _near_duplicates(self, task_type: str, memories: List[MemoryEntry], hashes: List[str],
+                         max_distance: float) -> List[List[int]]:
+        """For each of ``memories``, the rows of the others within ``max_distance`` of it."""
+        vectors = self._encode_memories(memories, hashes)
+        vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        row_of = {id(memory): row for row, memory in enumerate(memories)}
+        neighbours: List[List[int]] = []
+        for start in range(0, len(memories), CONSOLIDATION_BATCH_SIZE):
+            batch = vectors[start:start + CONSOLIDATION_BATCH_SIZE]
+            with self._lock.read():
+                _, ids = self.index.search(batch, CONSOLIDATION_NEIGHBOURS, task_type)
+                found = [[self.memories[i] for i in hits if i >= 0] for hits in ids]
+            for row, hits in enumerate(found, start):
+                candidates = [row_of[id(m)] for m in hits if id(m) in row_of and row_of[id(m)] != row]
+                distances = np.sum((vectors[candidates] - vectors[row]) ** 2, axis=1)
+                neighbours.append([c for c, d in zip(candidates, distances) if d <= max_distance])
+        return neighbours
+    
+    async def aconsolidate(self, max_distance: float = None, task_type: str = None) -> Dict[str, Any]:
+        """Consolidate on the encode executor; only the final merge step blocks this store's writers."""
+        return await run_in_encode_pool(self.consolidate, max_distance, task_type)
+    
+    async def aadd_memory(self, memory: MemoryEntry):
+        """Add memory entry, encoding and persisting off the event loop."""
+        await self.aadd_memories([memory])
+    
+    async def aadd_memories(self, memories: List[MemoryEntry]):
+        """Add memory entries, encoding and persisting off the event loop."""
+        if not memories:
+            return
+        embeddings = await run_in_encode_pool(self.encode_memories, memories)
+        future = Future()
+        with self._pending_lock:
+            self._pending.append((memories, embeddings, future))
+        # The persist executor is single-threaded: by the time this drain runs,
+        # an earlier one may already have committed these memories in its batch.
+        await run_in_persist_pool(self._commit_pending)
+        await asyncio.wrap_future(future)
+    
+    def _commit_pending(self):
+        """Add every queued write with one index insert and one log append."""
+        with self._pending_lock:
+            batch, self._pending = self._pending, []
+        if not batch:
+            return
+        memories = [memory for entries, _, _ in batch for memory in entries]
+        embeddings = [vectors for _, vectors, _ in batch]
+        try:
+            self.add_memories(memories, None if any(e is None for e in embeddings) else np.vstack(embeddings))
+        except Exception as e:
+            for _, _, future in batch:
+                future.set_exception(e)
+        else:
+            for _, _, future in batch:
+                future.set_result(None)
+    
+    def close(self):
+        """Flush pending write-ahead log records to disk."""
+        self.log.close()
+    
+    def status(self) -> Dict[str, Any]:
+        """Cached store state for readiness probes (does no I/O)."""
+        return {
+            "memory_file": self.memory_file.name,
+            "memories": len(self.memories),
+            "max_entries": self.max_entries,
+            "evicted": self.evicted,
+            "index_size": self.index.ntotal if (self.index and self.use_vector) else 0,
+            "index_backends": self.index.backends() if (self.index and self.use_vector) else {},
+            "encoder_loaded": self.encoder is not None,
+            "using_vector_search": self.use_vector,
+            "last_persist_at": self.last_persist_at,
+            "embedding_cache": self.embedding_cache.stats(),
+            "text_index": self.text_index.stats(),
+            "retrieval_mode": self.retrieval_mode,
+            "reranker": getattr(self.reranker, "model_name", None),
+        }
+    
+    def search(self, query: str, task_type: str = None, top_k: int = None,
                filter_success: Optional[bool] = None) -> List[MemoryEntry]:
         """Search for relevant memories."""
         top_k = top_k or TOP_K_RETRIEVAL
@@ -122,12 +613,62 @@ class MemoryService:
         if len(self.memories) == 0:
             return []
         
-        if self.use_vector and self.index and self.index.ntotal > 0:
-            return self._vector_search(query, task_type, top_k, filter_success)
-        else:
+        if not self._vector_ready():
             return self._text_search(query, task_type, top_k, filter_success)
+        if self.retrieval_mode == "hybrid":
+            return self._hybrid_search(query, task_type, top_k, filter_success)
+        return self._vector_search(query, task_type, top_k, filter_success)
+    
+    def _vector_ready(self) -> bool:
+        """Whether searches should use the vector index."""
+        return (self.retrieval_mode != "text" and self.use_vector
+                and self.index is not None and self.index.ntotal > 0)
+    
+    async def asearch(self, query: str, task_type: str = None, top_k: int = None,
+                      filter_success: Optional[bool] = None) -> List[MemoryEntry]:
+        """Search for relevant memories without blocking the event loop."""
+        return await run_in_encode_pool(self.search, query, task_type, top_k, filter_success)
+    
+    def search_batch(self, queries: List[str], task_types: List[Optional[str]] = None,
+                     top_k: int = None, filter_success: Optional[bool] = None) -> List[List[MemoryEntry]]:
+        """Search for many queries with one encode call and one multi-row search per task type."""
+        top_k = top_k or TOP_K_RETRIEVAL
+        task_types = task_types or [None] * len(queries)
+        
+        if len(self.memories) == 0:
+            return [[] for _ in queries]
+        
+        if self._vector_ready() and queries:
+            query_embeddings = self.encode_queries(queries)
+            if query_embeddings is not None and self.retrieval_mode == "hybrid":
+                return [
+                    self._hybrid_search(query, task_type, top_k, filter_success, embedding)
+                    for query, task_type, embedding in zip(queries, task_types, query_embeddings)
+                ]
+            if query_embeddings is not None:
+                rows_by_type: Dict[Optional[str], List[int]] = {}
+                for row, task_type in enumerate(task_types):
+                    rows_by_type.setdefault(task_type, []).append(row)
+                
+                results: List[List[MemoryEntry]] = [[] for _ in queries]
+                with self._lock.read():
+                    for task_type, rows in rows_by_type.items():
+                        _, ids = self.index.search(query_embeddings[rows], top_k, task_type, filter_success)
+                        for row, hits in zip(rows, ids):
+                            results[row] = self._collect_hits(hits)
+                return results
+        
+        return [
+            self._text_search(query, task_type, top_k, filter_success)
+            for query, task_type in zip(queries, task_types)
+        ]
+    
+    async def asearch_batch(self, queries: List[str], task_types: List[Optional[str]] = None,
+                            top_k: int = None, filter_success: Optional[bool] = None) -> List[List[MemoryEntry]]:
+        """Batch search without blocking the event loop."""
+        return await run_in_encode_pool(self.search_batch, queries, task_types, top_k, filter_success)
     
-    def _vector_search(self, query: str, task_type: str, top_k: int, 
+    def _vector_search(self, query: str, task_type: str, top_k: int,
                       filter_success: Optional[bool]) -> List[MemoryEntry]:
         """Vector-based semantic search."""
         query_embedding = self._encode_text(query)
@@ -135,68 +676,91 @@ class MemoryService:
             return self._text_search(query, task_type, top_k, filter_success)
         
         query_embedding = query_embedding.reshape(1, -1)
-        k = min(top_k * 2, len(self.memories))
-        distances, indices = self.index.search(query_embedding, k)
+        with self._lock.read():
+            # Filters select index partitions, so every hit already matches.
+            _, ids = self.index.search(query_embedding, top_k, task_type, filter_success)
+            return self._collect_hits(ids[0])
+    
+    def _hybrid_search(self, query: str, task_type: str, top_k: int, filter_success: Optional[bool],
+                       query_embedding=None) -> List[MemoryEntry]:
+        """Vector and BM25 candidates fused into one ranking, optionally reranked."""
+        if query_embedding is None:
+            query_embedding = self._encode_text(query)
+            if query_embedding is None:
+                return self._text_search(query, task_type, top_k, filter_success)
         
-        results = []
-        for idx, dist in zip(indices[0], distances[0]):
-            if idx >= len(self.memories):
-                continue
-            
-            memory = self.memories[idx]
-            if task_type and memory.task_type != task_type:
-                continue
-            if filter_success is not None and memory.success != filter_success:
-                continue
-            
-            results.append((dist, memory))
-            if len(results) >= top_k:
-                break
+        candidates = max(top_k, self.hybrid_candidates)
+        shortlist = max(top_k, self.rerank_top_n) if self.reranker else top_k
+        with self._lock.read():
+            distances, ids = self.index.search(query_embedding.reshape(1, -1), candidates, task_type, filter_success)
+            # Smaller distances are better; fusion expects higher scores to be better
+            vector_hits = [(int(idx), -float(dist)) for dist, idx in zip(distances[0], ids[0]) if idx >= 0]
+            text_hits = self.text_index.search(query, candidates, task_type, filter_success)
+            fused = fuse(vector_hits, text_hits, HYBRID_FUSION, HYBRID_VECTOR_WEIGHT, HYBRID_RRF_K)
+            positions = [pos for pos, _ in fused[:shortlist]]
+            if not self.reranker or len(positions) < 2:
+                return self._collect_hits(positions[:top_k])
+            shortlisted = [self.memories[pos] for pos in positions]
         
-        results.sort(key=lambda x: x[0])
-        return [m for _, m in results]
+        # Cross-encoding is slow; run it outside the lock so writes are not held up
+        try:
+            scores = self.reranker.score(query, [self._memory_text(memory) for memory in shortlisted])
+            order = np.argsort(-scores, kind="stable")[:top_k]
+        except Exception as e:
+            print(f"⚠️  Reranking failed, using fused order: {e}")
+            order = range(min(top_k, len(positions)))
+        with self._lock.read():
+            return self._collect_hits([positions[i] for i in order], [shortlisted[i] for i in order])
     
-    def _text_search(self, query: str, task_type: str, top_k: int,
-                    filter_success: Optional[bool]) -> List[MemoryEntry]:
-        """Simple text-based search."""
-        results = []
-        query_lower = query.lower()
+    def _collect_hits(self, ids, expected: List[MemoryEntry] = None) -> List[MemoryEntry]:
+        """
+        Map one row of index hits (nearest first) to memories, recording their use.
         
-        for memory in self.memories:
-            if task_type and memory.task_type != task_type:
+        ``expected`` holds the memories read at those positions before the lock
+        was released; they are returned as read, and use is only recorded for
+        the ones still at their position.
+        """
+        now = time.time()
+        hits = []
+        for i, idx in enumerate(ids):
+            memory = self.memories[idx] if 0 <= idx < len(self.memories) else None
+            if expected is not None and memory is not expected[i]:
+                hits.append(expected[i])
                 continue
-            if filter_success is not None and memory.success != filter_success:
+            if memory is None:
                 continue
-            
-            score = 0
-            if query_lower in memory.task.lower():
-                score += 2
-            if any(word in memory.task.lower() for word in query_lower.split()[:3]):
-                score += 1
-            if memory.success:
-                score += 1
-            
-            if score > 0:
-                results.append((score, memory))
+            with self._usage_lock:
+                usage = self._usage[idx]
+                usage.last_used = now
+                usage.hits += 1
+            hits.append(memory)
+        return hits
+    
+    def _text_search(self, query: str, task_type: str, top_k: int,
+                    filter_success: Optional[bool]) -> List[MemoryEntry]:
+        """BM25 search over the inverted text index."""
+        with self._lock.read():
+            hits = self.text_index.search(query, top_k, task_type, filter_success)
+            return self._collect_hits([pos for pos, _ in hits])
+    
+    def page(self, limit: int = 10, task_type: str = None, success: Optional[bool] = None,
+             start_us: Optional[int] = None, end_us: Optional[int] = None,
+             cursor: Optional[SortKey] = None, newest_first: bool = True):
+        """
+        One page of memories by timestamp, via the secondary indexes.
         
-        results.sort(key=lambda x: x[0], reverse=True)
-        return [m for _, m in results[:top_k]]
+        Returns (memories, number matching, cursor for the next page or None).
+        """
+        with self._lock.read():
+            return self.secondary.page(task_type, success, start_us, end_us, cursor, limit, newest_first)
     
     def get_stats(self) -> Dict:
         """Get memory statistics."""
-        total = len(self.memories)
-        successful = sum(1 for m in self.memories if m.success)
-        task_types = {}
-        for m in self.memories:
-            task_types[m.task_type] = task_types.get(m.task_type, 0) + 1
+        with self._lock.read():
+            stats = self.stats.snapshot(time.time())
         
         return {
-            "total_memories": total,
-            "successful": successful,
-            "failed": total - successful,
-            "success_rate": successful / total if total > 0 else 0,
-            "task_types": task_types,
+            **stats,
             "vector_index_size": self.index.ntotal if (self.index and self.use_vector) else 0,
             "using_vector_search": self.use_vector
         }
-
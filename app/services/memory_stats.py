@@ -0,0 +1,153 @@
+"""Incrementally maintained memory statistics."""
+from collections import deque
+from typing import Any, Deque, Dict, List
+
+import numpy as np
+
+from app.models.memory import MemoryEntry
+from app.services.memory_columns import MemoryColumns
+
+BUCKETS_PER_WINDOW = 60
+
+
+def window_label(seconds: int) -> str:
+    """Short label for a window length, e.g. 3600 -> "1h"."""
+    for unit, size in (("d", 86400), ("h", 3600), ("m", 60)):
+        if seconds % size == 0:
+            return f"{seconds // size}{unit}"
+    return f"{seconds}s"
+
+
+class RollingWindow:
+    """
+    Outcome counts over the last ``seconds``, kept in time buckets.
+    
+    The window is split into ``BUCKETS_PER_WINDOW`` buckets with running
+    totals, so recording and reading are O(1) amortized; the oldest
+    bucket expires as a whole, which makes the window edge accurate to
+    one bucket width.
+    """
+    
+    def __init__(self, seconds: int):
+        self.seconds = seconds
+        self.width = max(1, seconds // BUCKETS_PER_WINDOW)
+        self._buckets: Deque[List[int]] = deque()  # [bucket, total, successful]
+        self.total = 0
+        self.successful = 0
+    
+    def record(self, at: float, success: bool, count: int = 1):
+        """Count ``count`` outcomes observed at Unix time ``at``."""
+        bucket = int(at // self.width)
+        if self._buckets and self._buckets[-1][0] == bucket:
+            entry = self._buckets[-1]
+        else:
+            # Outcomes arrive in time order except for rare clock skew; keep
+            # buckets sorted by inserting from the right.
+            position = len(self._buckets)
+            while position and self._buckets[position - 1][0] > bucket:
+                position -= 1
+            if position and self._buckets[position - 1][0] == bucket:
+                entry = self._buckets[position - 1]
+            else:
+                entry = [bucket, 0, 0]
+                self._buckets.insert(position, entry)
+        entry[1] += count
+        entry[2] += count if success else 0
+        self.total += count
+        self.successful += count if success else 0
+    
+    def expire(self, now: float):
+        """Drop buckets that fell out of the window."""
+        oldest = int((now - self.seconds) // self.width)
+        while self._buckets and self._buckets[0][0] <= oldest:
+            _, total, successful = self._buckets.popleft()
+            self.total -= total
+            self.successful -= successful
+    
+    def snapshot(self, now: float) -> Dict[str, Any]:
+        """Counts and success rate for the window ending at ``now``."""
+        self.expire(now)
+        return {
+            "total": self.total,
+            "successful": self.successful,
+            "success_rate": self.successful / self.total if self.total else 0.0,
+        }
+
+
+class MemoryStats:
+    """
+    Counters over a memory store, updated on every add and removal.
+    
+    Per-``task_type`` totals track the memories currently in the store, so
+    eviction and consolidation decrement them. Rolling windows track
+    outcomes of tasks solved recently and are not affected by removals.
+    """
+    
+    def __init__(self, windows: List[int]):
+        self.by_type: Dict[str, List[int]] = {}  # task_type -> [total, successful]
+        self.total = 0
+        self.successful = 0
+        self.windows = {window_label(seconds): RollingWindow(seconds) for seconds in windows}
+    
+    def reset(self, columns: MemoryColumns):
+        """Recount from a store's columns (used when a store is loaded)."""
+        totals = np.bincount(columns.task_type, minlength=len(columns.types))
+        successes = np.bincount(columns.task_type, weights=columns.success, minlength=len(columns.types))
+        self.by_type = {
+            columns.types[code]: [int(totals[code]), int(successes[code])]
+            for code in range(len(columns.types)) if totals[code]
+        }
+        self.total = len(columns)
+        self.successful = int(np.count_nonzero(columns.success))
+    
+    def add(self, memories: List[MemoryEntry]):
+        """Count memories entering the store."""
+        for memory in memories:
+            counts = self.by_type.setdefault(memory.task_type, [0, 0])
+            counts[0] += 1
+            counts[1] += 1 if memory.success else 0
+        self.total += len(memories)
+        self.successful += sum(1 for m in memories if m.success)
+    
+    def remove(self, memories: List[MemoryEntry]):
+        """Uncount memories leaving the store."""
+        for memory in memories:
+            counts = self.by_type[memory.task_type]
+            counts[0] -= 1
+            counts[1] -= 1 if memory.success else 0
+            if counts[0] == 0:
+                del self.by_type[memory.task_type]
+        self.total -= len(memories)
+        self.successful -= sum(1 for m in memories if m.success)
+    
+    def record_outcomes(self, timestamps_us: "np.ndarray", success: "np.ndarray"):
+        """Add solved-task outcomes (int64 microsecond timestamps) to the rolling windows."""
+        if not len(timestamps_us):
+            return
+        order = np.argsort(timestamps_us, kind='stable')
+        seconds = timestamps_us[order] / 1_000_000
+        outcomes = success[order]
+        for window in self.windows.values():
+            recent = seconds > seconds[-1] - window.seconds
+            for at, ok in zip(seconds[recent], outcomes[recent]):
+                window.record(float(at), bool(ok))
+    
+    def snapshot(self, now: float) -> Dict[str, Any]:
+        """Current counters; O(task types + windows)."""
+        return {
+            "total_memories": self.total,
+            "successful": self.successful,
+            "failed": self.total - self.successful,
+            "success_rate": self.successful / self.total if self.total > 0 else 0,
+            "task_types": {task_type: counts[0] for task_type, counts in self.by_type.items()},
+            "task_type_stats": {
+                task_type: {
+                    "total": total,
+                    "successful": successful,
+                    "failed": total - successful,
+                    "success_rate": successful / total if total else 0.0,
+                }
+                for task_type, (total, successful) in self.by_type.items()
+            },
+            "windows": {label: window.snapshot(now) for label, window in self.windows.items()},
+        }
@@ -0,0 +1,121 @@
+"""Streaming NDJSON export and import of memory stores."""
+import json
+from typing import Any, AsyncIterable, Dict, Iterator, List, Optional, Union
+
+from app.models.memory import MemoryEntry
+from app.services.memory_service import MemoryService
+from app.core.config import EXPORT_PAGE_SIZE, IMPORT_BATCH_SIZE
+
+MAX_REPORTED_ERRORS = 20
+
+
+def iter_export(service: MemoryService, task_type: Optional[str] = None,
+                success: Optional[bool] = None, start_us: Optional[int] = None,
+                end_us: Optional[int] = None, page_size: int = None) -> Iterator[str]:
+    """
+    Yield the store as NDJSON lines, oldest first.
+    
+    Memories are read one cursor page at a time, so only ``page_size``
+    entries are held at once and writers are not blocked for the whole export.
+    """
+    page_size = page_size or EXPORT_PAGE_SIZE
+    cursor = None
+    while True:
+        memories, _, cursor = service.page(page_size, task_type, success, start_us, end_us,
+                                           cursor=cursor, newest_first=False)
+        if memories:
+            yield "".join(json.dumps(m.to_dict()) + "\n" for m in memories)
+        if cursor is None:
+            return
+
+
+class NDJSONImporter:
+    """
+    Parse NDJSON records and add them to a store in batches.
+    
+    Feed raw chunks of any size; every ``batch_size`` valid records are
+    added with one encode call, one index insert and one log append.
+    Malformed lines are counted and reported, not fatal. Imports go
+    through the store's eviction like any other add, so an import that
+    overflows ``max_entries`` keeps only the survivors; the summary reports
+    how many memories were evicted meanwhile and the store size afterwards.
+    """
+    
+    def __init__(self, service: MemoryService, batch_size: int = None):
+        self.service = service
+        self.batch_size = max(1, batch_size or IMPORT_BATCH_SIZE)
+        self.imported = 0
+        self.failed = 0
+        self.errors: List[str] = []
+        self._line = 0
+        self._buffer = b""
+        self._batch: List[MemoryEntry] = []
+        self._evicted_before = service.evicted
+    
+    def _parse(self, raw: bytes):
+        self._line += 1
+        if not raw.strip():
+            return
+        try:
+            self._batch.append(MemoryEntry.from_dict(json.loads(raw)))
+        except Exception as e:
+            self.failed += 1
+            if len(self.errors) < MAX_REPORTED_ERRORS:
+                self.errors.append(f"line {self._line}: {e}")
+    
+    def _split(self, chunk: Union[bytes, str]):
+        if isinstance(chunk, str):
+            chunk = chunk.encode("utf-8")
+        *lines, self._buffer = (self._buffer + chunk).split(b"\n")
+        for raw in lines:
+            self._parse(raw)
+    
+    def _take_batch(self, final: bool = False) -> List[MemoryEntry]:
+        if len(self._batch) < self.batch_size and not final:
+            return []
+        batch, self._batch = self._batch, []
+        self.imported += len(batch)
+        return batch
+    
+    async def afeed(self, chunk: Union[bytes, str]):
+        """Parse a chunk and add any full batch (encoding and writes run on the executors)."""
+        self._split(chunk)
+        batch = self._take_batch()
+        if batch:
+            await self.service.aadd_memories(batch)
+    
+    async def afinish(self) -> Dict[str, Any]:
+        """Flush the trailing line and batch; returns the import summary."""
+        self._parse(self._buffer)
+        self._buffer = b""
+        batch = self._take_batch(final=True)
+        if batch:
+            await self.service.aadd_memories(batch)
+        result = self.result()
+        if result["warning"]:
+            print(f"⚠️  {result['warning']}")
+        return result
+    
+    def result(self) -> Dict[str, Any]:
+        evicted = self.service.evicted - self._evicted_before
+        warning = None
+        if evicted:
+            warning = (f"{self.service.memory_file.name} holds at most {self.service.max_entries} memories; "
+                       f"{evicted} were evicted during the import")
+        return {
+            "imported": self.imported,
+            "failed": self.failed,
+            "errors": self.errors,
+            "evicted": evicted,
+            "memories": len(self.service.memories),
+            "warning": warning,
+        }
+
+
+async def aimport_chunks(service: MemoryService, chunks: AsyncIterable[bytes],
+                         batch_size: int = None) -> Dict[str, Any]:
+    """Import NDJSON from an async stream of byte chunks (e.g. a request body)."""
+    importer = NDJSONImporter(service, batch_size)
+    async for chunk in chunks:
+        await importer.afeed(chunk)
+    return await importer.afinish()
@@ -0,0 +1,76 @@
+"""Process-wide registry of shared service instances."""
+import threading
+from pathlib import Path
+from typing import Dict
+
+from app.services.llm_service import LLMService
+from app.services.memory_service import MemoryService, SentenceTransformer, HAS_VECTOR_DEPS
+from app.services.hybrid_search import Reranker, HAS_CROSS_ENCODER
+from app.core.config import EMBEDDING_MODEL, MEMORY_FILE, RERANKER_MODEL, RETRIEVAL_MODE
+
+_lock = threading.RLock()
+_encoder = None
+_encoder_loaded = False
+_reranker = None
+_reranker_loaded = False
+_llm_service = None
+_memory_services: Dict[Path, MemoryService] = {}
+
+
+def get_encoder():
+    """Return the shared SentenceTransformer, or None if it cannot be loaded."""
+    global _encoder, _encoder_loaded
+    with _lock:
+        if not _encoder_loaded:
+            _encoder_loaded = True
+            if HAS_VECTOR_DEPS:
+                try:
+                    _encoder = SentenceTransformer(EMBEDDING_MODEL)
+                except Exception as e:
+                    print(f"⚠️  Vector search initialization failed: {e}")
+        return _encoder
+
+
+def get_reranker():
+    """Return the shared cross-encoder for hybrid search, or None if not configured or unavailable."""
+    global _reranker, _reranker_loaded
+    with _lock:
+        if not _reranker_loaded:
+            _reranker_loaded = True
+            if RERANKER_MODEL and RETRIEVAL_MODE == "hybrid":
+                if not HAS_CROSS_ENCODER:
+                    print("⚠️  RERANKER_MODEL set but sentence-transformers is not installed")
+                else:
+                    try:
+                        _reranker = Reranker(RERANKER_MODEL)
+                    except Exception as e:
+                        print(f"⚠️  Reranker initialization failed: {e}")
+        return _reranker
+
+
+def get_memory_service(memory_file: Path = None) -> MemoryService:
+    """Return the single MemoryService for a memory file."""
+    key = Path(memory_file or MEMORY_FILE).resolve()
+    with _lock:
+        service = _memory_services.get(key)
+        if service is None:
+            encoder = get_encoder()
+            service = MemoryService(memory_file=key, use_vector=encoder is not None,
+                                    encoder=encoder, reranker=get_reranker())
+            _memory_services[key] = service
+        return service
+
+
+def get_llm_service() -> LLMService:
+    """Return the shared LLMService."""
+    global _llm_service
+    with _lock:
+        if _llm_service is None:
+            _llm_service = LLMService()
+        return _llm_service
+
+
+def memory_services() -> Dict[Path, MemoryService]:
+    """Snapshot of the memory services created so far."""
+    with _lock:
+        return dict(_memory_services)
@@ -0,0 +1,105 @@
+"""Secondary indexes over memories for filtered, paginated browsing."""
+import base64
+from bisect import bisect_left, bisect_right, insort
+from typing import Dict, Hashable, List, Optional, Tuple
+
+from app.models.memory import MemoryEntry
+
+# (timestamp in microseconds, insertion sequence number)
+SortKey = Tuple[int, int]
+
+
+def encode_cursor(key: SortKey) -> str:
+    """Opaque pagination cursor for the last item of a page."""
+    return base64.urlsafe_b64encode(f"{key[0]}:{key[1]}".encode("ascii")).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> SortKey:
+    """Inverse of ``encode_cursor``; raises ValueError on malformed input."""
+    try:
+        timestamp, seq = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("ascii").split(":")
+        return int(timestamp), int(seq)
+    except Exception:
+        raise ValueError(f"Invalid cursor: {cursor}")
+
+
+def filter_keys(task_type: str, success: bool) -> List[Hashable]:
+    """Keys of the filtered lists a memory with ``task_type`` and ``success`` belongs to."""
+    return [("type", task_type), ("success", success), ("type_success", task_type, success)]
+
+
+def filter_key(task_type: Optional[str], success: Optional[bool]) -> Hashable:
+    """Key of the list matching both filters (None when unfiltered)."""
+    if task_type and success is not None:
+        return ("type_success", task_type, success)
+    if task_type:
+        return ("type", task_type)
+    if success is not None:
+        return ("success", success)
+    return None
+
+
+class SecondaryIndex:
+    """
+    Memories sorted by ``(timestamp, seq)``, per filter combination.
+    
+    There is one sorted list for the whole store, one per ``task_type``, one
+    per success value and one per ``(task_type, success)`` pair, so a
+    filtered, time-ranged page is two binary searches plus a slice of the
+    page size. New memories normally arrive in time order and are appended;
+    removals rebuild the lists.
+    """
+    
+    def __init__(self):
+        self._lists: Dict[Hashable, List[SortKey]] = {}
+        self._memories: Dict[int, MemoryEntry] = {}
+    
+    def add(self, memories: List[MemoryEntry], timestamps: List[int], seqs: List[int]):
+        """Index memories with their timestamps (microseconds) and sequence numbers."""
+        for memory, timestamp, seq in zip(memories, timestamps, seqs):
+            entry = (int(timestamp), int(seq))
+            self._memories[entry[1]] = memory
+            for key in [None] + filter_keys(memory.task_type, bool(memory.success)):
+                items = self._lists.setdefault(key, [])
+                if not items or items[-1] <= entry:
+                    items.append(entry)
+                else:
+                    insort(items, entry)
+    
+    def rebuild(self, memories: List[MemoryEntry], timestamps: List[int], seqs: List[int]):
+        """Re-index from scratch (after memories were removed)."""
+        self._lists = {}
+        self._memories = {}
+        order = sorted(range(len(memories)), key=lambda i: (timestamps[i], seqs[i]))
+        self.add([memories[i] for i in order], [timestamps[i] for i in order], [seqs[i] for i in order])
+    
+    def page(self, task_type: Optional[str] = None, success: Optional[bool] = None,
+             start_us: Optional[int] = None, end_us: Optional[int] = None,
+             cursor: Optional[SortKey] = None, limit: int = 10,
+             newest_first: bool = True) -> Tuple[List[MemoryEntry], int, Optional[SortKey]]:
+        """
+        One page of matching memories.
+        
+        Returns (memories, number matching the filters and time range,
+        sort key to pass as ``cursor`` for the next page or None).
+        """
+        items = self._lists.get(filter_key(task_type, success), [])
+        lo = bisect_left(items, (start_us, -1)) if start_us is not None else 0
+        hi = bisect_left(items, (end_us, -1)) if end_us is not None else len(items)
+        matched = max(0, hi - lo)
+        
+        if newest_first:
+            if cursor is not None:
+                hi = min(hi, bisect_left(items, cursor))
+            begin = max(lo, hi - limit)
+            selected = items[begin:hi][::-1]
+            more = begin > lo
+        else:
+            if cursor is not None:
+                lo = max(lo, bisect_right(items, cursor))
+            end = min(hi, lo + limit)
+            selected = items[lo:end]
+            more = end < hi
+        
+        memories = [self._memories[seq] for _, seq in selected]
+        return memories, matched, (selected[-1] if more and selected else None)
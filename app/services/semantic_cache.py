@@ -0,0 +1,73 @@
+"""Semantic answer cache for near-duplicate tasks."""
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from app.models.memory import MemoryEntry
+from app.utils.cache_stats import hit_stats
+
+
+class SemanticCache:
+    """
+    Recent successful memories per task type, looked up by task embedding.
+    
+    A task whose normalized embedding lies within ``max_distance`` (squared
+    L2, i.e. ``2 - 2·cosine``) of a cached task of the same type reuses that
+    memory's solution instead of calling the LLM. Each task type keeps at
+    most ``max_entries`` entries, and entries expire after ``ttl_seconds``.
+    
+    The cache is process-local: it only holds tasks solved by this process
+    since it started, so each worker warms its own copy.
+    """
+    
+    def __init__(self, max_distance: float = 0.05, max_entries: int = 256,
+                 ttl_seconds: float = 3600):
+        self.max_distance = max_distance
+        self.max_entries = max(1, max_entries)
+        self.ttl_seconds = ttl_seconds
+        self._entries: Dict[str, Deque[Tuple["np.ndarray", MemoryEntry, float]]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    @staticmethod
+    def _normalize(embedding: "np.ndarray") -> "np.ndarray":
+        embedding = np.asarray(embedding, dtype='float32').reshape(-1)
+        norm = np.linalg.norm(embedding)
+        return embedding / norm if norm else embedding
+    
+    def lookup(self, task_type: str, embedding: "np.ndarray") -> Optional[Tuple[MemoryEntry, float]]:
+        """Closest cached memory and its distance, or None if nothing is close enough."""
+        query = self._normalize(embedding)
+        now = time.time()
+        with self._lock:
+            entries = self._entries.get(task_type)
+            while entries and entries[0][2] <= now:
+                entries.popleft()
+            if entries:
+                matrix = np.stack([vector for vector, _, _ in entries])
+                distances = np.sum((matrix - query) ** 2, axis=1)
+                best = int(np.argmin(distances))
+                if distances[best] <= self.max_distance:
+                    self.hits += 1
+                    return entries[best][1], float(distances[best])
+            self.misses += 1
+            return None
+    
+    def add(self, task_type: str, embedding: "np.ndarray", memory: MemoryEntry):
+        """Remember a successful memory under its task embedding."""
+        if not memory.success:
+            return
+        with self._lock:
+            entries = self._entries.setdefault(task_type, deque(maxlen=self.max_entries))
+            entries.append((self._normalize(embedding), memory, time.time() + self.ttl_seconds))
+    
+    def stats(self) -> Dict[str, float]:
+        """Hit/miss counters."""
+        return hit_stats(sum(len(entries) for entries in self._entries.values()), self.hits, self.misses)
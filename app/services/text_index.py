@@ -0,0 +1,163 @@
+"""Inverted index with BM25 scoring for lexical memory search."""
+import math
+import re
+from collections import Counter
+from typing import Dict, Hashable, List, Optional, Tuple
+
+import numpy as np
+
+from app.models.memory import MemoryEntry
+from app.services.secondary_index import filter_key, filter_keys
+
+# BM25 term-frequency saturation and length normalization
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the this to was were will with".split()
+)
+
+_TOKEN = re.compile(r"[a-z0-9]+(?:\.[0-9]+)?")
+_THOUSANDS = re.compile(r"(?<=\d),(?=\d{3})")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word and number tokens; "$50,000.00" becomes "50000.00"."""
+    return [token for token in _TOKEN.findall(_THOUSANDS.sub("", text.lower())) if token not in STOPWORDS]
+
+
+def memory_text(memory: MemoryEntry) -> str:
+    """Text indexed for a memory (the same fields that are embedded)."""
+    return f"{memory.task} {memory.solution} {' '.join(memory.key_insights)}"
+
+
+def _contains(sorted_positions: "np.ndarray", positions: "np.ndarray") -> "np.ndarray":
+    """Mask of ``positions`` present in the sorted, non-empty ``sorted_positions``."""
+    found = np.searchsorted(sorted_positions, positions)
+    found[found == len(sorted_positions)] = 0
+    return sorted_positions[found] == positions
+
+
+class _Postings:
+    """Positions and term frequencies of one term, in growable arrays."""
+    
+    __slots__ = ("positions", "freqs", "size")
+    
+    def __init__(self):
+        self.positions = np.zeros(4, dtype='int64')
+        self.freqs = np.zeros(4, dtype='float32')
+        self.size = 0
+    
+    def append(self, position: int, freq: int = 1):
+        if self.size == len(self.positions):
+            self.positions = np.resize(self.positions, 2 * self.size)
+            self.freqs = np.resize(self.freqs, 2 * self.size)
+        self.positions[self.size] = position
+        self.freqs[self.size] = freq
+        self.size += 1
+    
+    def arrays(self) -> Tuple["np.ndarray", "np.ndarray"]:
+        return self.positions[:self.size], self.freqs[:self.size]
+
+
+class TextIndex:
+    """
+    BM25 over memory texts, keyed by store position.
+    
+    Postings hold, per term, the positions containing it and their term
+    frequencies, so a query only scores documents sharing a term with it
+    (vectorized per term), and its cost depends on those postings, not on
+    the store size. Positions are also listed per ``task_type``, success
+    value and both; a filtered query intersects these sorted lists with the
+    term postings before scoring. The top ``k`` are selected with a partial
+    sort. Memories are appended incrementally; removals rebuild the index.
+    """
+    
+    def __init__(self, k1: float = BM25_K1, b: float = BM25_B):
+        self.k1 = k1
+        self.b = b
+        self.reset()
+    
+    def reset(self):
+        """Drop all documents."""
+        self._postings: Dict[str, _Postings] = {}
+        self._filters: Dict[Hashable, _Postings] = {}
+        self._lengths = _Postings()  # positions unused; freqs hold document lengths
+        self._total_length = 0
+    
+    def __len__(self) -> int:
+        return self._lengths.size
+    
+    def add(self, memories: List[MemoryEntry]):
+        """Index memories at the next positions."""
+        for memory in memories:
+            position = self._lengths.size
+            tokens = tokenize(memory_text(memory))
+            for term, count in Counter(tokens).items():
+                postings = self._postings.get(term)
+                if postings is None:
+                    postings = self._postings[term] = _Postings()
+                postings.append(position, count)
+            self._lengths.append(position, len(tokens))
+            self._total_length += len(tokens)
+            for key in filter_keys(memory.task_type, bool(memory.success)):
+                postings = self._filters.get(key)
+                if postings is None:
+                    postings = self._filters[key] = _Postings()
+                postings.append(position)
+    
+    def rebuild(self, memories: List[MemoryEntry]):
+        """Re-index from scratch (after memories were removed)."""
+        self.reset()
+        self.add(memories)
+    
+    def scores(self, query: str, task_type: Optional[str] = None,
+               success: Optional[bool] = None) -> Tuple["np.ndarray", "np.ndarray"]:
+        """(positions, BM25 scores) of matching memories sharing a term with ``query``."""
+        count = self._lengths.size
+        empty = (np.zeros(0, dtype='int64'), np.zeros(0, dtype='float32'))
+        if not count:
+            return empty
+        allowed = None
+        key = filter_key(task_type, success)
+        if key is not None:
+            filter_postings = self._filters.get(key)
+            if filter_postings is None:
+                return empty
+            allowed = filter_postings.arrays()[0]
+        
+        lengths = self._lengths.arrays()[1]
+        average = self._total_length / count or 1.0
+        hit_positions, hit_scores = [], []
+        for term in set(tokenize(query)):
+            postings = self._postings.get(term)
+            if postings is None:
+                continue
+            positions, freqs = postings.arrays()
+            idf = math.log(1 + (count - postings.size + 0.5) / (postings.size + 0.5))
+            if allowed is not None:
+                keep = _contains(allowed, positions)
+                positions, freqs = positions[keep], freqs[keep]
+            norm = self.k1 * (1 - self.b + self.b * lengths[positions] / average)
+            hit_positions.append(positions)
+            hit_scores.append(idf * freqs * (self.k1 + 1) / (freqs + norm))
+        if not hit_positions:
+            return empty
+        # Sum each position's per-term scores over the union of the postings
+        positions, inverse = np.unique(np.concatenate(hit_positions), return_inverse=True)
+        scores = np.bincount(inverse, weights=np.concatenate(hit_scores), minlength=len(positions))
+        return positions, scores.astype('float32')
+    
+    def search(self, query: str, top_k: int, task_type: Optional[str] = None,
+               success: Optional[bool] = None) -> List[Tuple[int, float]]:
+        """Top ``top_k`` (position, score) pairs, best first; ties go to newer memories."""
+        positions, scores = self.scores(query, task_type, success)
+        if len(positions) > top_k:
+            best = np.argpartition(-scores, top_k - 1)[:top_k]
+            positions, scores = positions[best], scores[best]
+        order = np.lexsort((-positions, -scores))
+        return [(int(positions[i]), float(scores[i])) for i in order]
+    
+    def stats(self) -> Dict[str, int]:
+        """Index size."""
+        return {"documents": self._lengths.size, "terms": len(self._postings)}
@@ -0,0 +1,299 @@
+"""Partitioned FAISS index for filtered vector search."""
+import json
+import math
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import numpy as np
+    import faiss
+except ImportError:
+    np = None
+    faiss = None
+
+from app.core.config import (
+    VECTOR_INDEX_TYPE, VECTOR_INDEX_SWITCHOVER, IVF_NLIST, IVF_NPROBE,
+    PQ_M, PQ_NBITS, HNSW_M, HNSW_EF_CONSTRUCTION, HNSW_EF_SEARCH
+)
+
+PartitionKey = Tuple[str, bool]
+INDEX_TYPES = ("flat", "ivf_flat", "ivf_pq", "hnsw")
+
+
+def min_train_size(index_type: str) -> int:
+    """Fewest vectors an index type can be trained on."""
+    if index_type == "ivf_pq":
+        return 39 * 2 ** PQ_NBITS
+    if index_type == "ivf_flat":
+        return 39
+    return 1
+
+
+def build_index(index_type: str, vectors: "np.ndarray", ids: "np.ndarray", dim: int):
+    """Build, train and fill an ID-mapped FAISS index of ``index_type``."""
+    if index_type == "flat":
+        inner = faiss.IndexFlatL2(dim)
+    elif index_type == "hnsw":
+        inner = faiss.IndexHNSWFlat(dim, HNSW_M)
+        inner.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+    elif index_type in ("ivf_flat", "ivf_pq"):
+        n = len(vectors)
+        nlist = IVF_NLIST or int(4 * math.sqrt(n))
+        nlist = max(1, min(nlist, n // 39))
+        quantizer = faiss.IndexFlatL2(dim)
+        if index_type == "ivf_pq":
+            inner = faiss.IndexIVFPQ(quantizer, dim, nlist, PQ_M, PQ_NBITS)
+        else:
+            inner = faiss.IndexIVFFlat(quantizer, dim, nlist)
+        inner.train(vectors)
+    else:
+        raise ValueError(f"Unknown vector index type: {index_type} (expected one of {INDEX_TYPES})")
+    
+    index = faiss.IndexIDMap2(inner)
+    tune_index(index)
+    if len(vectors):
+        index.add_with_ids(vectors, ids)
+    return index
+
+
+def tune_index(index):
+    """Apply query-time parameters (nprobe / efSearch) to an index."""
+    inner = faiss.downcast_index(index.index)
+    if isinstance(inner, faiss.IndexIVF):
+        inner.nprobe = min(IVF_NPROBE, inner.nlist)
+    elif isinstance(inner, faiss.IndexHNSW):
+        inner.hnsw.efSearch = HNSW_EF_SEARCH
+
+
+def index_backend(index) -> str:
+    """Backend name of an ID-mapped partition index."""
+    inner = faiss.downcast_index(index.index)
+    if isinstance(inner, faiss.IndexIVFPQ):
+        return "ivf_pq"
+    if isinstance(inner, faiss.IndexIVFFlat):
+        return "ivf_flat"
+    if isinstance(inner, faiss.IndexHNSW):
+        return "hnsw"
+    return "flat"
+
+
+class PartitionedIndex:
+    """
+    FAISS vectors partitioned by ``(task_type, success)``.
+    
+    Each partition is an ID-mapped sub-index, so a filtered search only
+    touches the partitions that match and always returns ``k`` correctly
+    filtered neighbours without post-filtering or scanning the whole store.
+    An unfiltered search merges the per-partition results.
+    
+    Partitions start as exact flat indexes; once one holds ``switchover``
+    vectors it is trained and migrated to ``index_type`` (IVF/HNSW).
+    
+    Training and rebuilding only read the current partitions, so a caller
+    that guards the index with a lock can build replacements while searches
+    go on (``add(migrate=False)``, ``pending_migrations``, ``build_migration``
+    and ``prepare_remap``) and only swap them in exclusively.
+    """
+    
+    def __init__(self, dim: int, index_type: str = None, switchover: int = None):
+        self.dim = dim
+        self.index_type = index_type or VECTOR_INDEX_TYPE
+        self.switchover = VECTOR_INDEX_SWITCHOVER if switchover is None else switchover
+        if self.index_type not in INDEX_TYPES:
+            raise ValueError(f"Unknown vector index type: {self.index_type} (expected one of {INDEX_TYPES})")
+        self.partitions: Dict[PartitionKey, "faiss.Index"] = {}
+    
+    @property
+    def ntotal(self) -> int:
+        return sum(p.ntotal for p in self.partitions.values())
+    
+    def _new_partition(self):
+        return faiss.IndexIDMap2(faiss.IndexFlatL2(self.dim))
+    
+    def backends(self) -> Dict[str, int]:
+        """Number of partitions per index backend."""
+        counts: Dict[str, int] = {}
+        for partition in self.partitions.values():
+            backend = index_backend(partition)
+            counts[backend] = counts.get(backend, 0) + 1
+        return counts
+    
+    def _needs_migration(self, key: PartitionKey) -> bool:
+        partition = self.partitions[key]
+        return (self.index_type != "flat"
+                and partition.ntotal >= max(self.switchover, min_train_size(self.index_type))
+                and index_backend(partition) == "flat")
+    
+    def pending_migrations(self) -> List[PartitionKey]:
+        """Flat partitions that have crossed the switchover size."""
+        return [key for key in self.partitions if self._needs_migration(key)]
+    
+    def build_migration(self, key: PartitionKey):
+        """Trained ``index_type`` copy of a partition (read-only, so safe alongside searches)."""
+        partition = self.partitions[key]
+        vectors = faiss.downcast_index(partition.index).reconstruct_n(0, partition.ntotal)
+        ids = faiss.vector_to_array(partition.id_map).astype('int64')
+        return build_index(self.index_type, vectors, ids, self.dim)
+    
+    def replace(self, key: PartitionKey, partition):
+        """Swap in a partition built by ``build_migration``."""
+        self.partitions[key] = partition
+    
+    def _maybe_migrate(self, key: PartitionKey):
+        """Train and migrate a flat partition once it crosses the switchover size."""
+        if self._needs_migration(key):
+            self.partitions[key] = self.build_migration(key)
+    
+    def add(self, vectors: "np.ndarray", ids: List[int], keys: List[PartitionKey], migrate: bool = True):
+        """
+        Add vectors with their memory IDs to the partition for each key.
+        
+        With ``migrate=False`` partitions crossing the switchover stay flat
+        until the caller builds and swaps in their replacement.
+        """
+        vectors = np.ascontiguousarray(vectors, dtype='float32')
+        ids = np.asarray(ids, dtype='int64')
+        rows_by_key: Dict[PartitionKey, List[int]] = {}
+        for row, key in enumerate(keys):
+            rows_by_key.setdefault(key, []).append(row)
+        
+        for key, rows in rows_by_key.items():
+            partition = self.partitions.get(key)
+            if partition is None:
+                partition = self.partitions[key] = self._new_partition()
+            partition.add_with_ids(vectors[rows], ids[rows])
+            if migrate:
+                self._maybe_migrate(key)
+    
+    def prepare_remap(self, new_ids: "np.ndarray") -> Dict[PartitionKey, "faiss.Index"]:
+        """
+        Build the partitions ``remap(new_ids)`` would rebuild, without changing the index.
+        
+        Pass the result to ``remap`` so the slow rebuilds happen before an
+        exclusive lock is taken.
+        """
+        new_ids = np.asarray(new_ids, dtype='int64')
+        rebuilt = {}
+        for key, partition in self.partitions.items():
+            backend = index_backend(partition)
+            if backend == "flat":
+                continue
+            mapped = new_ids[faiss.vector_to_array(partition.id_map).astype('int64')]
+            keep = mapped >= 0
+            if keep.any() and not keep.all():
+                rebuilt[key] = self._rebuild(partition, backend, keep, mapped)
+        return rebuilt
+    
+    def remap(self, new_ids: "np.ndarray", rebuilt: Dict[PartitionKey, "faiss.Index"] = None):
+        """
+        Drop and renumber vectors by ID.
+        
+        ``new_ids[old_id]`` is a vector's new ID, or -1 to remove it. Flat
+        partitions remove in place. HNSW cannot delete, and removing from an
+        ID-mapped IVF index compacts the ID map but not the labels stored in
+        the inverted lists, so any other partition that loses vectors is
+        rebuilt from the remaining ones (or taken from ``rebuilt``, the result
+        of ``prepare_remap`` for the same ``new_ids``).
+        """
+        new_ids = np.asarray(new_ids, dtype='int64')
+        rebuilt = rebuilt or {}
+        for key in list(self.partitions):
+            partition = self.partitions[key]
+            old_ids = faiss.vector_to_array(partition.id_map).astype('int64')
+            mapped = new_ids[old_ids]
+            keep = mapped >= 0
+            
+            if not keep.any():
+                del self.partitions[key]
+                continue
+            if not keep.all():
+                backend = index_backend(partition)
+                if backend != "flat":
+                    self.partitions[key] = (rebuilt[key] if key in rebuilt
+                                            else self._rebuild(partition, backend, keep, mapped))
+                    continue
+                partition.remove_ids(np.ascontiguousarray(old_ids[~keep]))
+                mapped = new_ids[faiss.vector_to_array(partition.id_map).astype('int64')]
+            
+            faiss.copy_array_to_vector(np.ascontiguousarray(mapped), partition.id_map)
+            partition.construct_rev_map()
+    
+    def _rebuild(self, partition, backend: str, keep: "np.ndarray", ids: "np.ndarray"):
+        """New partition of the kept vectors under their new IDs."""
+        inner = faiss.downcast_index(partition.index)
+        vectors = inner.reconstruct_n(0, partition.ntotal)[keep]
+        if backend == "hnsw":
+            return build_index("hnsw", vectors, ids[keep], self.dim)
+        # IVF: keep the trained quantizer (and PQ codebooks, which re-encode
+        # their own reconstructions unchanged) and refill the inverted lists
+        trained = faiss.clone_index(inner)
+        trained.reset()
+        rebuilt = faiss.IndexIDMap2(trained)
+        tune_index(rebuilt)
+        rebuilt.add_with_ids(vectors, ids[keep])
+        return rebuilt
+    
+    def matching(self, task_type: Optional[str] = None,
+                 success: Optional[bool] = None) -> List[PartitionKey]:
+        """Partition keys that satisfy the filters."""
+        return [
+            key for key in self.partitions
+            if (not task_type or key[0] == task_type)
+            and (success is None or key[1] == success)
+        ]
+    
+    def search(self, queries: "np.ndarray", k: int, task_type: Optional[str] = None,
+               success: Optional[bool] = None) -> Tuple["np.ndarray", "np.ndarray"]:
+        """
+        Search the matching partitions and merge their top-k.
+        
+        Returns (distances, ids) of shape (n_queries, k), padded with
+        ``inf`` / ``-1`` when fewer than ``k`` vectors match.
+        """
+        queries = np.ascontiguousarray(queries, dtype='float32')
+        n = queries.shape[0]
+        all_distances = [np.full((n, k), np.inf, dtype='float32')]
+        all_ids = [np.full((n, k), -1, dtype='int64')]
+        
+        for key in self.matching(task_type, success):
+            partition = self.partitions[key]
+            if partition.ntotal == 0:
+                continue
+            distances, ids = partition.search(queries, min(k, partition.ntotal))
+            all_distances.append(distances)
+            all_ids.append(ids)
+        
+        distances = np.concatenate(all_distances, axis=1)
+        ids = np.concatenate(all_ids, axis=1)
+        order = np.argsort(distances, axis=1, kind='stable')[:, :k]
+        return np.take_along_axis(distances, order, axis=1), np.take_along_axis(ids, order, axis=1)
+    
+    def save(self, path: Path):
+        """Serialize all partitions into one ``.npz`` archive."""
+        keys = list(self.partitions)
+        arrays = {
+            f"p{i}": faiss.serialize_index(self.partitions[key])
+            for i, key in enumerate(keys)
+        }
+        arrays["keys"] = np.array(json.dumps([[t, s] for t, s in keys]))
+        arrays["dim"] = np.array(self.dim)
+        with open(path, 'wb') as f:
+            np.savez(f, **arrays)
+    
+    @classmethod
+    def load(cls, path: Path) -> "PartitionedIndex":
+        """
+        Read partitions written by ``save``.
+        
+        Query parameters are re-applied from config, and flat partitions
+        that crossed the switchover under a different setting are migrated.
+        """
+        with np.load(path, allow_pickle=False) as archive:
+            index = cls(int(archive["dim"]))
+            for i, (task_type, success) in enumerate(json.loads(str(archive["keys"]))):
+                partition = faiss.deserialize_index(archive[f"p{i}"])
+                tune_index(partition)
+                index.partitions[(task_type, bool(success))] = partition
+        for key in list(index.partitions):
+            index._maybe_migrate(key)
+        return index
@@ -0,0 +1,14 @@
+"""Hit/miss reporting shared by the in-process caches."""
+from typing import Any, Dict
+
+
+def hit_stats(entries: int, hits: int, misses: int, **counters: int) -> Dict[str, Any]:
+    """Entry count, hit/miss counters (plus any extra ``counters``) and hit rate."""
+    lookups = hits + misses
+    return {
+        "entries": entries,
+        "hits": hits,
+        **counters,
+        "misses": misses,
+        "hit_rate": hits / lookups if lookups else 0.0,
+    }
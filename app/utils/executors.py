@@ -0,0 +1,34 @@
+"""Bounded executors for running blocking work off the event loop."""
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+from app.core.config import ENCODE_WORKERS
+
+# Embedding and vector search (CPU-bound, releases the GIL in torch/faiss)
+encode_executor = ThreadPoolExecutor(max_workers=ENCODE_WORKERS, thread_name_prefix="encode")
+
+# Memory persistence: a single thread keeps writes to each store ordered
+persist_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="persist")
+
+# LLM response cache SQLite tier: one thread shares the connection
+cache_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="llm-cache")
+
+
+async def run_in_encode_pool(fn: Callable, *args, **kwargs) -> Any:
+    """Run CPU-bound encoding/search work on the encode executor."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(encode_executor, functools.partial(fn, *args, **kwargs))
+
+
+async def run_in_persist_pool(fn: Callable, *args, **kwargs) -> Any:
+    """Run memory mutations and disk writes on the persist executor."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(persist_executor, functools.partial(fn, *args, **kwargs))
+
+
+async def run_in_cache_pool(fn: Callable, *args, **kwargs) -> Any:
+    """Run LLM response cache disk I/O on the cache executor."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(cache_executor, functools.partial(fn, *args, **kwargs))
@@ -0,0 +1,88 @@
+"""Reader-writer lock for state that is read far more often than it is written."""
+import threading
+from contextlib import contextmanager
+
+
+class ReadWriteLock:
+    """
+    Many concurrent readers or one writer.
+    
+    Writers are preferred: once a writer waits, new readers queue behind it,
+    so a steady stream of searches cannot starve writes. Both sides are
+    reentrant per thread, and a thread holding the write lock may also read.
+    """
+    
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer = None
+        self._write_depth = 0
+        self._writers_waiting = 0
+        self._local = threading.local()
+    
+    def _read_depth(self) -> int:
+        return getattr(self._local, "depth", 0)
+    
+    def acquire_read(self):
+        me = threading.get_ident()
+        if self._writer == me or self._read_depth():
+            self._local.depth = self._read_depth() + 1
+            return
+        with self._cond:
+            while self._writer is not None or self._writers_waiting:
+                self._cond.wait()
+            self._readers += 1
+        self._local.depth = 1
+    
+    def release_read(self):
+        depth = self._read_depth() - 1
+        self._local.depth = depth
+        if depth or self._writer == threading.get_ident():
+            return
+        with self._cond:
+            self._readers -= 1
+            if not self._readers:
+                self._cond.notify_all()
+    
+    def acquire_write(self):
+        me = threading.get_ident()
+        if self._writer == me:
+            self._write_depth += 1
+            return
+        if self._read_depth():
+            raise RuntimeError("Cannot upgrade a read lock to a write lock")
+        with self._cond:
+            self._writers_waiting += 1
+            try:
+                while self._writer is not None or self._readers:
+                    self._cond.wait()
+            finally:
+                self._writers_waiting -= 1
+            self._writer = me
+            self._write_depth = 1
+    
+    def release_write(self):
+        self._write_depth -= 1
+        if self._write_depth:
+            return
+        with self._cond:
+            self._writer = None
+            self._cond.notify_all()
+    
+    @contextmanager
+    def read(self):
+        """Hold the lock shared for the enclosed block."""
+        self.acquire_read()
+        try:
+            yield
+        finally:
+            self.release_read()
+    
+    @contextmanager
+    def write(self):
+        """Hold the lock exclusively for the enclosed block."""
+        self.acquire_write()
+        try:
+            yield
+        finally:
+            self.release_write()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Recall-vs-latency report for the vector index backends.
+Compares IVF-Flat, IVF-PQ and HNSW against the exact flat baseline so
+VECTOR_INDEX_TYPE / IVF_NPROBE / HNSW_EF_SEARCH can be chosen per store.
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import faiss
+
+# Add project root to path (parent of scripts directory)
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.core.config import EMBEDDING_MODEL, VECTOR_DIM
+from app.services.embedding_store import EmbeddingStore
+from app.services.vector_index import build_index
+
+
+def load_vectors(args):
+    """Vectors from a store's embedding sidecar, or synthetic clustered data."""
+    if args.memory_file:
+        store = EmbeddingStore(Path(args.memory_file), EMBEDDING_MODEL, VECTOR_DIM)
+        store.load()
+        vectors = store.vectors()
+        if not len(vectors):
+            raise SystemExit(f"No embeddings found for {args.memory_file}")
+        return vectors
+    
+    rng = np.random.default_rng(args.seed)
+    centers = rng.normal(size=(max(1, args.size // 500), VECTOR_DIM)).astype('float32')
+    labels = rng.integers(0, len(centers), size=args.size)
+    vectors = centers[labels] + 0.3 * rng.normal(size=(args.size, VECTOR_DIM)).astype('float32')
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def timed_search(index, queries, k):
+    """Search one query at a time (the /solve pattern); returns ids and ms/query."""
+    ids = np.empty((len(queries), k), dtype='int64')
+    start = time.perf_counter()
+    for row, query in enumerate(queries):
+        _, ids[row] = index.search(query.reshape(1, -1), k)
+    return ids, (time.perf_counter() - start) * 1000 / len(queries)
+
+
+def recall(found, truth):
+    """Mean fraction of the exact top-k recovered."""
+    return float(np.mean([len(set(f) & set(t)) / len(t) for f, t in zip(found, truth)]))
+
+
+def main():
+    """Build each backend and print recall@k and latency against flat."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--memory-file", help="Use this store's embedding sidecar instead of synthetic data")
+    parser.add_argument("--size", type=int, default=100000, help="Synthetic store size")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--nprobe", default="4,16,64", help="IVF nprobe values to sweep")
+    parser.add_argument("--ef-search", default="16,64,256", help="HNSW efSearch values to sweep")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    
+    vectors = load_vectors(args)
+    ids = np.arange(len(vectors), dtype='int64')
+    rng = np.random.default_rng(args.seed + 1)
+    sample = rng.choice(len(vectors), size=min(args.queries, len(vectors)), replace=False)
+    queries = vectors[sample] + 0.05 * rng.normal(size=(len(sample), vectors.shape[1])).astype('float32')
+    
+    print("\n" + "=" * 70)
+    print(f"  Vector Index Benchmark: {len(vectors):,} vectors, {len(queries)} queries, k={args.k}")
+    print("=" * 70)
+    
+    flat = build_index("flat", vectors, ids, vectors.shape[1])
+    truth, flat_ms = timed_search(flat, queries, args.k)
+    rows = [("flat", "-", 0.0, 1.0, flat_ms)]
+    
+    for index_type, param, values in [
+        ("ivf_flat", "nprobe", args.nprobe),
+        ("ivf_pq", "nprobe", args.nprobe),
+        ("hnsw", "efSearch", args.ef_search),
+    ]:
+        start = time.perf_counter()
+        try:
+            index = build_index(index_type, vectors, ids, vectors.shape[1])
+        except Exception as e:
+            print(f"⚠️  Skipping {index_type}: {e}")
+            continue
+        build_s = time.perf_counter() - start
+        
+        inner = faiss.downcast_index(index.index)
+        for value in [int(v) for v in values.split(",")]:
+            if param == "nprobe":
+                inner.nprobe = value
+            else:
+                inner.hnsw.efSearch = value
+            found, ms = timed_search(index, queries, args.k)
+            rows.append((index_type, f"{param}={value}", build_s, recall(found, truth), ms))
+    
+    print(f"\n{'backend':<10} {'params':<14} {'build s':>8} {'recall@' + str(args.k):>10} {'ms/query':>9} {'speedup':>8}")
+    print("-" * 64)
+    for index_type, params, build_s, rec, ms in rows:
+        print(f"{index_type:<10} {params:<14} {build_s:>8.2f} {rec:>10.3f} {ms:>9.3f} {flat_ms / ms:>7.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Fake OpenAI-compatible LLM server for exercising timeouts, retries,
+circuit breaking, hedging and fallback without a real provider:
+    
+    python3 scripts/fake_llm_server.py --port 9000 --latency 0.2 --slow-rate 0.1 --error-rate 0.2
+    LLM_PROVIDER=openai USE_MOCK_LLM=false LLM_BASE_URL=http://localhost:9000/v1 python3 main.py
+
+GET /stats reports how many requests were served, failed and slowed down.
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+app = FastAPI(title="Fake LLM provider")
+settings = argparse.Namespace()
+counters = {"requests": 0, "errors": 0, "slow": 0}
+
+
+def _answer(messages) -> str:
+    prompt = messages[-1]["content"] if messages else ""
+    return f"Fake analysis of a {len(prompt)}-character prompt. " * settings.repeat
+
+
+async def _delay():
+    """Base latency, with an occasional slow (tail) response."""
+    latency = settings.latency
+    if random.random() < settings.slow_rate:
+        counters["slow"] += 1
+        latency = settings.slow_latency
+    await asyncio.sleep(latency)
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    """OpenAI chat completions, streaming or not."""
+    body = await request.json()
+    counters["requests"] += 1
+    await _delay()
+    if random.random() < settings.error_rate:
+        counters["errors"] += 1
+        return JSONResponse(status_code=settings.error_status,
+                            content={"error": {"message": "injected failure", "type": "server_error"}})
+    
+    text = _answer(body.get("messages", []))
+    base = {"id": f"fake-{counters['requests']}", "created": int(time.time()), "model": body.get("model", "fake")}
+    if not body.get("stream"):
+        return {
+            **base,
+            "object": "chat.completion",
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+        }
+    
+    async def chunks():
+        for word in text.split(" "):
+            delta = {"index": 0, "delta": {"content": word + " "}, "finish_reason": None}
+            yield f"data: {json.dumps({**base, 'object': 'chat.completion.chunk', 'choices': [delta]})}\n\n"
+            await asyncio.sleep(settings.token_delay)
+        yield "data: [DONE]\n\n"
+    
+    return StreamingResponse(chunks(), media_type="text/event-stream")
+
+
+@app.get("/stats")
+async def stats():
+    """Request counters."""
+    return counters
+
+
+def main():
+    """Parse arguments and serve."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds before every response")
+    parser.add_argument("--slow-rate", type=float, default=0.0, help="Fraction of requests that are slow")
+    parser.add_argument("--slow-latency", type=float, default=5.0, help="Latency of a slow request")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests that fail")
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--token-delay", type=float, default=0.01, help="Seconds between streamed tokens")
+    parser.add_argument("--repeat", type=int, default=3, help="Sentences per answer")
+    parser.parse_args(namespace=settings)
+    uvicorn.run(app, host=settings.host, port=settings.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
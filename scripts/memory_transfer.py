@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Export or import a memory store as NDJSON through a running API server.
+Both directions stream, so neither side holds the whole store in memory:
+    
+    python3 scripts/memory_transfer.py export --url http://src:8000 -o memory.ndjson
+    python3 scripts/memory_transfer.py import --url http://dst:8000 -i memory.ndjson
+    python3 scripts/memory_transfer.py export --url http://src:8000 | \\
+        python3 scripts/memory_transfer.py import --url http://dst:8000
+"""
+import argparse
+import sys
+
+import requests
+
+CHUNK_SIZE = 1 << 20
+
+
+def export_store(args) -> int:
+    """Stream GET /memories/export into a file or stdout."""
+    params = {"store": args.store}
+    for name in ("task_type", "start", "end"):
+        if getattr(args, name):
+            params[name] = getattr(args, name)
+    
+    out = open(args.output, 'wb') if args.output else sys.stdout.buffer
+    written = 0
+    try:
+        with requests.get(f"{args.url}/api/v1/memories/export", params=params,
+                          stream=True, timeout=args.timeout) as response:
+            response.raise_for_status()
+            for chunk in response.iter_content(CHUNK_SIZE):
+                out.write(chunk)
+                written += len(chunk)
+    finally:
+        if args.output:
+            out.close()
+    print(f"✅ Exported {written:,} bytes from {args.store} store", file=sys.stderr)
+    return 0
+
+
+def read_chunks(stream):
+    """Yield fixed-size chunks from a binary stream (sent with chunked encoding)."""
+    while True:
+        chunk = stream.read(CHUNK_SIZE)
+        if not chunk:
+            return
+        yield chunk
+
+
+def import_store(args) -> int:
+    """Stream a file or stdin to POST /memories/import."""
+    source = open(args.input, 'rb') if args.input else sys.stdin.buffer
+    try:
+        response = requests.post(f"{args.url}/api/v1/memories/import", params={"store": args.store},
+                                 data=read_chunks(source),
+                                 headers={"Content-Type": "application/x-ndjson"},
+                                 timeout=args.timeout)
+    finally:
+        if args.input:
+            source.close()
+    response.raise_for_status()
+    result = response.json()
+    print(f"✅ Imported {result['imported']:,} memories into {args.store} store "
+          f"({result['memories']:,} stored)", file=sys.stderr)
+    if result["warning"]:
+        print(f"⚠️  {result['warning']}", file=sys.stderr)
+    if result["failed"]:
+        print(f"⚠️  {result['failed']:,} lines failed", file=sys.stderr)
+        for error in result["errors"]:
+            print(f"   {error}", file=sys.stderr)
+    return 0 if not result["failed"] else 1
+
+
+def main():
+    """Parse arguments and run export or import."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8000", help="API server base URL")
+    parser.add_argument("--store", default="memory", choices=["memory", "financial"])
+    parser.add_argument("--timeout", type=float, default=3600)
+    commands = parser.add_subparsers(dest="command", required=True)
+    
+    export_parser = commands.add_parser("export", help="Write the store as NDJSON")
+    export_parser.add_argument("-o", "--output", help="Output file (default: stdout)")
+    export_parser.add_argument("--task-type")
+    export_parser.add_argument("--start", help="Only memories at or after this ISO time")
+    export_parser.add_argument("--end", help="Only memories before this ISO time")
+    
+    import_parser = commands.add_parser("import", help="Add NDJSON memories to the store")
+    import_parser.add_argument("-i", "--input", help="Input file (default: stdin)")
+    
+    args = parser.parse_args()
+    return export_store(args) if args.command == "export" else import_store(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Test that vector IDs keep pointing at the right memories when memories are
+removed (eviction, consolidation) from flat, IVF and HNSW partitions.
+Runs without downloading a model (uses a hashing encoder).
+"""
+import hashlib
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+# Add project root to path (parent of scripts directory)
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.core.config import VECTOR_DIM
+from app.models.memory import MemoryEntry
+from app.services.memory_service import MemoryService
+from app.services.vector_index import PartitionedIndex
+
+
+class HashingEncoder:
+    """Deterministic bag-of-words embeddings, normalized like MiniLM's."""
+    
+    def encode(self, texts, convert_to_numpy=True, **kwargs):
+        vectors = np.zeros((len(texts), VECTOR_DIM), dtype='float32')
+        for row, text in enumerate(texts):
+            for word in text.lower().split():
+                vectors[row, int(hashlib.md5(word.encode()).hexdigest(), 16) % VECTOR_DIM] += 1
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.where(norms > 0, norms, 1)
+
+
+def _memory(i: int) -> MemoryEntry:
+    return MemoryEntry(
+        task=f"Assess wire transfer {i} of ${i * 1000} for client{i} in region{i % 7}",
+        task_type="risk_assessment",
+        solution=f"Risk level for case{i}",
+        success=True,
+        reasoning="",
+        timestamp="2026-01-01T00:00:00",
+        key_insights=[f"insight{i}"],
+    )
+
+
+def _assert_self_hits(service: MemoryService):
+    """Every memory's own text must return that memory as the top hit."""
+    wrong = [
+        pos for pos, memory in enumerate(service.memories)
+        if service.search(service._memory_text(memory), top_k=1) != [memory]
+    ]
+    assert not wrong, f"{len(wrong)} of {len(service.memories)} memories return the wrong top hit"
+
+
+def test_remap_keeps_ids():
+    """Removing vectors from every backend leaves survivors under their new IDs."""
+    print("\n" + "=" * 70)
+    print("  Test: PartitionedIndex.remap")
+    print("=" * 70)
+    
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((300, VECTOR_DIM)).astype('float32')
+    removed = np.arange(300) % 10 == 0
+    new_ids = np.full(300, -1, dtype='int64')
+    new_ids[~removed] = np.arange((~removed).sum())
+    
+    for index_type in ("flat", "ivf_flat", "hnsw"):
+        index = PartitionedIndex(VECTOR_DIM, index_type, switchover=40)
+        index.add(vectors, range(300), [("risk_assessment", True)] * 300)
+        index.remap(new_ids)
+        _, ids = index.search(vectors[~removed], 1)
+        assert index.ntotal == (~removed).sum()
+        assert (ids[:, 0] == np.arange((~removed).sum())).all(), f"{index_type}: IDs out of sync"
+        print(f"✅ {index_type}: {index.ntotal} vectors renumbered ({index.backends()})")
+
+
+def test_ivf_eviction():
+    """Evicting from an IVF partition keeps each memory its own nearest neighbour."""
+    print("\n" + "=" * 70)
+    print("  Test: Eviction from an IVF partition")
+    print("=" * 70)
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        service = MemoryService(memory_file=Path(tmp) / "memory.json", encoder=HashingEncoder(),
+                                max_entries=100)
+        service.index = PartitionedIndex(VECTOR_DIM, "ivf_flat", switchover=40)
+        service.add_memories([_memory(i) for i in range(101)])
+        
+        assert service.evicted > 0, "store did not evict"
+        assert service.index.backends() == {"ivf_flat": 1}
+        assert service.index.ntotal == len(service.memories)
+        _assert_self_hits(service)
+        print(f"✅ {len(service.memories)} memories after evicting {service.evicted}, all found by their own text")
+        
+        service.close()
+
+
+def test_ivf_consolidation():
+    """Merging duplicates found through an IVF partition leaves one entry per task."""
+    print("\n" + "=" * 70)
+    print("  Test: Consolidation of an IVF partition")
+    print("=" * 70)
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        service = MemoryService(memory_file=Path(tmp) / "memory.json", encoder=HashingEncoder(),
+                                max_entries=0)
+        service.index = PartitionedIndex(VECTOR_DIM, "ivf_flat", switchover=40)
+        service.add_memories([_memory(i) for i in range(60) for _ in range(2)])
+        
+        result = service.consolidate(max_distance=0.01)
+        assert result["clusters"] == 60, result
+        assert len(service.memories) == 60
+        assert all(memory.attempts == 2 for memory in service.memories)
+        assert service.index.ntotal == len(service.memories)
+        _assert_self_hits(service)
+        print(f"✅ {result['before']} memories merged into {result['after']}, all found by their own text")
+        
+        service.close()
+
+
+def main():
+    """Run all vector index tests."""
+    try:
+        test_remap_keeps_ids()
+        test_ivf_eviction()
+        test_ivf_consolidation()
+        
+        print("\n" + "=" * 70)
+        print("  ✅ All Vector Index Tests Passed!")
+        print("=" * 70)
+        return 0
+    except Exception as e:
+        print(f"\n❌ Test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())